@@ -0,0 +1,73 @@
+"""Benchmark random-forest explanation modes against exact TreeSHAP.
+
+Usage:
+    python benchmarks/bench_explain_modes.py --artifacts artifacts/ --rows 100 --top-k 5
+
+Artifacts must come from `exml train --model rf`. Reports per-row latency and agreement with exact SHAP
+(top-k feature overlap and L1 error of the contribution vector) for each mode.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from exml.config import METADATA_FILENAME, MODEL_FILENAME, SUBSAMPLE_TREES_DEFAULT
+from exml.data import load_default_dataset
+from exml.explain import EXPLAIN_MODES, compute_shap_values
+
+
+def _top_k(values: np.ndarray, k: int) -> set[int]:
+    return set(np.argsort(-np.abs(values))[:k].tolist())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--artifacts", default="artifacts")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--trees", type=int, default=SUBSAMPLE_TREES_DEFAULT)
+    args = parser.parse_args()
+
+    artifacts = Path(args.artifacts)
+    pipeline = joblib.load(artifacts / MODEL_FILENAME)
+    metadata = json.loads((artifacts / METADATA_FILENAME).read_text(encoding="utf-8"))
+    if metadata["model_name"] != "rf":
+        raise SystemExit("Explanation modes only differ for rf artifacts; train with --model rf.")
+
+    rows = load_default_dataset().X[metadata["feature_names"]].head(args.rows)
+    results: dict[str, dict[str, float]] = {}
+    exact_values: list[np.ndarray] = []
+
+    for mode in EXPLAIN_MODES:
+        # Warm the explainer cache so the numbers reflect steady-state serving latency.
+        compute_shap_values(pipeline, rows.head(1), rows.head(1), "rf", mode=mode, n_trees=args.trees)
+        latencies, overlaps, l1_errors = [], [], []
+        for index in range(len(rows)):
+            row = rows.iloc[[index]]
+            start = time.perf_counter()
+            result = compute_shap_values(pipeline, row, row, "rf", mode=mode, n_trees=args.trees)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+            values = result.values[0]
+            if mode == "exact":
+                exact_values.append(values)
+            reference = exact_values[index]
+            overlaps.append(len(_top_k(values, args.top_k) & _top_k(reference, args.top_k)) / args.top_k)
+            l1_errors.append(float(np.abs(values - reference).sum() / max(np.abs(reference).sum(), 1e-12)))
+        results[mode] = {
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+            "top_k_overlap": round(float(np.mean(overlaps)), 4),
+            "relative_l1_error": round(float(np.mean(l1_errors)), 4),
+        }
+
+    print(json.dumps({"rows": len(rows), "top_k": args.top_k, "trees": args.trees, "modes": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
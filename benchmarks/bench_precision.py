@@ -0,0 +1,84 @@
+"""Benchmark float64 vs float32 serving: memory footprint and batch throughput.
+
+Usage:
+    python benchmarks/bench_precision.py --model logistic --rows 50000
+
+Trains one artifact set per precision on the built-in dataset, then reports the bytes held by the batch
+frame, SHAP background, model parameters and drift window, and rows/second for batch `predict_proba` and
+`explain_batch`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pickle  # nosec B403
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from exml.data import load_default_dataset
+from exml.explain import explain_batch
+from exml.monitoring import DriftMonitor
+from exml.precision import PRECISIONS, cast_frame
+from exml.train import train_and_save
+
+
+def _rows_per_second(func, frame: pd.DataFrame, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(frame)
+        best = min(best, time.perf_counter() - start)
+    return round(len(frame) / best, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", choices=["logistic", "rf"], default="logistic")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--explain-rows", type=int, default=2_000)
+    args = parser.parse_args()
+
+    X = load_default_dataset().X
+    batch = pd.concat([X] * (args.rows // len(X) + 1), ignore_index=True).head(args.rows)
+    report: dict[str, dict[str, float]] = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for precision in PRECISIONS:
+            out = Path(tmp) / precision
+            metadata = train_and_save(args.model, str(out), precision=precision)
+            pipeline = joblib.load(out / "pipeline.joblib")
+            background = joblib.load(out / "background.joblib")
+            frame = cast_frame(batch, precision)
+            explain_frame = frame.head(args.explain_rows)
+            monitor = DriftMonitor(metadata["feature_baseline"], dtype=precision)
+
+            report[precision] = {
+                "batch_frame_bytes": int(frame.memory_usage(index=False).sum()),
+                "background_bytes": int(background.memory_usage(index=False).sum()),
+                "model_pickle_bytes": len(pickle.dumps(pipeline)),
+                "drift_window_bytes": monitor.window_nbytes,
+                "predict_rows_per_s": _rows_per_second(pipeline.predict_proba, frame),
+                "explain_rows_per_s": _rows_per_second(
+                    partial(explain_batch, pipeline, background, model_name=args.model),
+                    explain_frame,
+                ),
+                "max_probability_error": 0.0,
+            }
+            probabilities = pipeline.predict_proba(frame.head(len(X)))[:, 1].astype(np.float64)
+            if precision == "float64":
+                reference = probabilities
+            else:
+                report[precision]["max_probability_error"] = float(np.max(np.abs(probabilities - reference)))
+
+    print(json.dumps({"model": args.model, "rows": args.rows, "precisions": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark warm-start retraining against a full refit.
+
+Usage:
+    python benchmarks/bench_retrain.py --model rf --extra-trees 100
+
+Splits the built-in dataset into an initial batch, a newly labelled batch and a common holdout. Trains on the
+initial batch, then compares `retrain_and_save` on the new batch with a full refit on initial + new data.
+Both models are scored on the same holdout so validation AUC is comparable.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from exml.config import MODEL_FILENAME
+from exml.data import load_default_dataset
+from exml.retrain import retrain_and_save
+from exml.train import train_and_save
+
+
+def _holdout_auc(artifact_dir: Path, X, y) -> float:
+    pipeline = joblib.load(artifact_dir / MODEL_FILENAME)
+    return float(roc_auc_score(y, pipeline.predict_proba(X)[:, 1]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", choices=["logistic", "rf"], default="rf")
+    parser.add_argument("--extra-trees", type=int, default=100)
+    parser.add_argument("--replace-oldest", action="store_true")
+    args = parser.parse_args()
+
+    dataset = load_default_dataset()
+    frame = dataset.X.assign(target=dataset.y)
+    pool, holdout = train_test_split(frame, test_size=0.2, random_state=7, stratify=frame["target"])
+    initial, new = train_test_split(pool, test_size=0.4, random_state=7, stratify=pool["target"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        initial.to_csv(root / "initial.csv", index=False)
+        new.to_csv(root / "new.csv", index=False)
+        pool.to_csv(root / "combined.csv", index=False)
+
+        train_and_save(args.model, str(root / "base"), csv_path=str(root / "initial.csv"))
+
+        start = time.perf_counter()
+        retrained = retrain_and_save(
+            str(root / "base"),
+            str(root / "new.csv"),
+            out_dir=str(root / "warm"),
+            extra_trees=args.extra_trees,
+            replace_oldest=args.replace_oldest,
+        )
+        warm_wall = time.perf_counter() - start
+
+        start = time.perf_counter()
+        refit = train_and_save(args.model, str(root / "refit"), csv_path=str(root / "combined.csv"))
+        refit_wall = time.perf_counter() - start
+
+        X_holdout, y_holdout = holdout.drop(columns=["target"]), holdout["target"]
+        report = {
+            "model": args.model,
+            "warm_start": {
+                "fit_seconds": retrained["training_seconds"],
+                "wall_seconds": round(warm_wall, 4),
+                "holdout_roc_auc": round(_holdout_auc(root / "warm", X_holdout, y_holdout), 4),
+                **retrained["retrain"],
+            },
+            "full_refit": {
+                "fit_seconds": refit["training_seconds"],
+                "wall_seconds": round(refit_wall, 4),
+                "holdout_roc_auc": round(_holdout_auc(root / "refit", X_holdout, y_holdout), 4),
+            },
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
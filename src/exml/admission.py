@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+from exml.config import ADMISSION_ROLE_DEFAULTS
+
+
+@dataclass(frozen=True)
+class AdmissionLimits:
+    rate_per_second: float | None = None
+    burst: float | None = None
+    max_in_flight: int | None = None
+
+    @classmethod
+    def for_role(cls, role: str, overrides: dict[str, float | None] | None = None) -> AdmissionLimits:
+        values = {**ADMISSION_ROLE_DEFAULTS.get(role, {}), **(overrides or {})}
+        rate = values.get("rate_per_second")
+        burst = values.get("burst")
+        if burst is None and rate is not None:
+            burst = max(float(rate), 1.0)
+        max_in_flight = values.get("max_in_flight")
+        return cls(
+            rate_per_second=None if rate is None else float(rate),
+            burst=None if burst is None else float(burst),
+            max_in_flight=None if max_in_flight is None else int(max_in_flight),
+        )
+
+
+class _KeyState:
+    __slots__ = (
+        "limits",
+        "tokens",
+        "updated",
+        "in_flight",
+        "admitted",
+        "rate_limited",
+        "concurrency_limited",
+        "lock",
+    )
+
+    def __init__(self, limits: AdmissionLimits, now: float):
+        self.limits = limits
+        self.tokens = limits.burst if limits.burst is not None else 0.0
+        self.updated = now
+        self.in_flight = 0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.concurrency_limited = 0
+        self.lock = threading.Lock()
+
+
+class AdmissionController:
+    """Per-key token-bucket rate limits plus a cap on in-flight requests.
+
+    Each key owns its own small lock, so keys never contend with each other and an admission check is a few
+    arithmetic operations under an uncontended lock.
+    """
+
+    def __init__(
+        self,
+        principals: Iterable[tuple[str, AdmissionLimits]] = (),
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._clock = clock
+        self._states: dict[str, _KeyState] = {}
+        self._create_lock = threading.Lock()
+        for key_id, limits in principals:
+            self._states.setdefault(key_id, _KeyState(limits, clock()))
+
+    def _state(self, key_id: str, limits: AdmissionLimits) -> _KeyState:
+        state = self._states.get(key_id)
+        if state is None:
+            with self._create_lock:
+                state = self._states.setdefault(key_id, _KeyState(limits, self._clock()))
+        return state
+
+    def acquire(self, key_id: str, limits: AdmissionLimits) -> float | None:
+        """Admit one request for ``key_id``; returns ``None`` when admitted, else seconds until retrying helps."""
+        state = self._state(key_id, limits)
+        with state.lock:
+            if limits.max_in_flight is not None and state.in_flight >= limits.max_in_flight:
+                state.concurrency_limited += 1
+                return 1.0
+            if limits.rate_per_second is not None and limits.burst is not None:
+                now = self._clock()
+                state.tokens = min(limits.burst, state.tokens + (now - state.updated) * limits.rate_per_second)
+                state.updated = now
+                if state.tokens < 1.0:
+                    state.rate_limited += 1
+                    return (1.0 - state.tokens) / limits.rate_per_second if limits.rate_per_second > 0 else 60.0
+                state.tokens -= 1.0
+            state.in_flight += 1
+            state.admitted += 1
+            return None
+
+    def release(self, key_id: str) -> None:
+        state = self._states.get(key_id)
+        if state is None:
+            return
+        with state.lock:
+            state.in_flight = max(state.in_flight - 1, 0)
+
+    def snapshot(self) -> dict[str, dict[str, float | int | None]]:
+        counters: dict[str, dict[str, float | int | None]] = {}
+        for key_id, state in list(self._states.items()):
+            with state.lock:
+                counters[key_id] = {
+                    "in_flight": state.in_flight,
+                    "admitted": state.admitted,
+                    "rate_limited": state.rate_limited,
+                    "concurrency_limited": state.concurrency_limited,
+                    "tokens": None if state.limits.burst is None else round(state.tokens, 3),
+                    "rate_per_second": state.limits.rate_per_second,
+                    "max_in_flight": state.limits.max_in_flight,
+                }
+        return counters
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
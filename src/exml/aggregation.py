@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+
+from exml.config import (
+    DRIFT_HISTOGRAM_BINS,
+    DRIFT_PUBLISH_INTERVAL_SECONDS,
+    DRIFT_SHM_SLOTS,
+    DRIFT_SNAPSHOT_MAX_AGE_SECONDS,
+)
+from exml.monitoring import DriftMonitor, DriftState
+
+logger = logging.getLogger("exml.aggregation")
+
+
+def default_replica_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class DriftSink(Protocol):
+    def publish(self, replica_id: str, state: DriftState) -> None: ...
+
+    def collect(self, max_age: float) -> dict[str, DriftState]: ...
+
+
+class DirectorySink:
+    """One JSON snapshot per replica in a shared directory (local disk for tests, a mounted volume in a cluster)."""
+
+    def __init__(self, path: Path | str, n_features: int, bins: int = DRIFT_HISTOGRAM_BINS):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.n_features = n_features
+        self.bins = bins
+
+    def publish(self, replica_id: str, state: DriftState) -> None:
+        payload = {"replica_id": replica_id, "timestamp": time.time(), "state": state.to_vector().tolist()}
+        # Every write gets its own temp file, so concurrent writers never share an inode before the atomic rename.
+        fd, tmp = tempfile.mkstemp(dir=self.path, prefix=f".{replica_id}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                handle.write(json.dumps(payload))
+            os.replace(tmp, self.path / f"{replica_id}.json")
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def collect(self, max_age: float) -> dict[str, DriftState]:
+        states: dict[str, DriftState] = {}
+        now = time.time()
+        for snapshot in self.path.glob("*.json"):
+            try:
+                payload = json.loads(snapshot.read_text(encoding="utf-8"))
+                vector = np.asarray(payload["state"], dtype=float)
+            except (OSError, ValueError, KeyError):
+                continue
+            if now - float(payload["timestamp"]) > max_age:
+                continue
+            if vector.size != DriftState.vector_size(self.n_features, self.bins):
+                continue
+            states[str(payload["replica_id"])] = DriftState.from_vector(vector, self.n_features, self.bins)
+        return states
+
+
+class SharedMemorySink:
+    """Per-worker slots in one named shared-memory block, for uvicorn workers on the same host.
+
+    Slot layout is ``[pid, sequence, timestamp, *state]``. Writers bump the sequence to an odd value before
+    writing and back to even afterwards; readers retry until they see the same even sequence on both sides of
+    the copy, so no lock is taken on the hot path. A file lock is only used once, to claim a slot.
+    ``collect`` skips the calling process's own slot; the aggregator merges its live local state instead.
+    Each slot must have a single writer, which ``DriftAggregator`` guarantees by serializing its publishes.
+    """
+
+    _HEADER = 3
+
+    def __init__(self, name: str, n_features: int, bins: int = DRIFT_HISTOGRAM_BINS, slots: int = DRIFT_SHM_SLOTS):
+        self.name = name
+        self.n_features = n_features
+        self.bins = bins
+        self.slots = slots
+        self._width = self._HEADER + DriftState.vector_size(n_features, bins)
+        size = slots * self._width * np.dtype(np.float64).itemsize
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name)
+        # Python < 3.13 tracks attached segments and unlinks them when this process exits, which would tear the
+        # block down under the other workers; the segment outlives any single worker instead.
+        resource_tracker.unregister(self._shm._name, "shared_memory")  # type: ignore[attr-defined]
+        if self._shm.size < size:
+            raise RuntimeError(f"Shared memory block '{name}' is too small; was it created for another model?")
+        self._table = np.ndarray((slots, self._width), dtype=np.float64, buffer=self._shm.buf)
+        self._slot: int | None = None
+
+    def _claim_slot(self) -> int:
+        pid = os.getpid()
+        lock_path = Path(tempfile.gettempdir()) / f"{self.name}.lock"
+        with open(lock_path, "a+") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                for index in range(self.slots):
+                    owner = int(self._table[index, 0])
+                    if owner == pid or owner == 0 or not _pid_alive(owner):
+                        self._table[index, :] = 0.0
+                        self._table[index, 0] = pid
+                        return index
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        raise RuntimeError(f"No free drift slots left in shared memory block '{self.name}'")
+
+    def publish(self, replica_id: str, state: DriftState) -> None:
+        if self._slot is None:
+            self._slot = self._claim_slot()
+        row = self._table[self._slot]
+        row[1] += 1.0
+        row[self._HEADER :] = state.to_vector()
+        row[2] = time.time()
+        row[1] += 1.0
+
+    def collect(self, max_age: float) -> dict[str, DriftState]:
+        states: dict[str, DriftState] = {}
+        now = time.time()
+        host = socket.gethostname()
+        own_pid = os.getpid()
+        for index in range(self.slots):
+            row = self._table[index]
+            for _ in range(5):
+                before = row[1]
+                copied = row.copy()
+                if before == row[1] and int(before) % 2 == 0:
+                    break
+            else:
+                continue
+            pid = int(copied[0])
+            if pid in (0, own_pid) or now - copied[2] > max_age or not _pid_alive(pid):
+                continue
+            states[f"{host}-{pid}"] = DriftState.from_vector(copied[self._HEADER :], self.n_features, self.bins)
+        return states
+
+    def unlink(self) -> None:
+        self._shm.close()
+        self._shm.unlink()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class TieredSink:
+    """Two-level sink: workers on one host share shared memory, and each host publishes its merged state.
+
+    Every worker writes its own shared-memory slot, then publishes the host-wide merge (its state plus its live
+    peers) to the replica sink under the host name. The workers of one host write near-identical snapshots to
+    the same key, and the latest one wins. ``collect`` returns the peers on this host plus every other host, so
+    each worker is counted once.
+    """
+
+    def __init__(
+        self,
+        local: SharedMemorySink,
+        remote: DriftSink,
+        host_id: str | None = None,
+        max_age: float = DRIFT_SNAPSHOT_MAX_AGE_SECONDS,
+    ):
+        self.local = local
+        self.remote = remote
+        self.host_id = host_id or socket.gethostname()
+        self.max_age = max_age
+
+    def publish(self, replica_id: str, state: DriftState) -> None:
+        self.local.publish(replica_id, state)
+        host_state = state
+        for peer in self.local.collect(self.max_age).values():
+            host_state = host_state.merge(peer)
+        self.remote.publish(self.host_id, host_state)
+
+    def collect(self, max_age: float) -> dict[str, DriftState]:
+        states = self.local.collect(max_age)
+        states.update(
+            (host_id, state) for host_id, state in self.remote.collect(max_age).items() if host_id != self.host_id
+        )
+        return states
+
+
+def load_drift_sink(n_features: int) -> DriftSink | None:
+    """Build the sink named by ``EXML_DRIFT_SINK``: ``shm:<block name>``, ``dir:<path>``, or both, comma-separated.
+
+    With both, workers share state through shared memory and each host publishes its merged state to the
+    directory (see ``TieredSink``).
+    """
+    raw = os.getenv("EXML_DRIFT_SINK")
+    if not raw:
+        return None
+    sinks: dict[str, DriftSink] = {}
+    for spec in raw.split(","):
+        kind, _, target = spec.strip().partition(":")
+        if not target:
+            raise RuntimeError("EXML_DRIFT_SINK entries must look like 'shm:<name>' or 'dir:<path>'")
+        if kind in sinks:
+            raise RuntimeError(f"EXML_DRIFT_SINK lists '{kind}' more than once")
+        if kind == "shm":
+            sinks[kind] = SharedMemorySink(target, n_features=n_features)
+        elif kind == "dir":
+            sinks[kind] = DirectorySink(target, n_features=n_features)
+        else:
+            raise RuntimeError(f"Unsupported EXML_DRIFT_SINK kind: {kind}")
+    local = sinks.get("shm")
+    if isinstance(local, SharedMemorySink) and "dir" in sinks:
+        return TieredSink(local, sinks["dir"])
+    return next(iter(sinks.values()))
+
+
+class DriftAggregator:
+    """Publishes this process's drift state and merges everyone else's into a global drift report.
+
+    ``start`` publishes on a timer independent of traffic, so an idle replica's window stays in the cluster view
+    instead of aging out of it.
+    """
+
+    def __init__(
+        self,
+        monitor: DriftMonitor,
+        sink: DriftSink,
+        replica_id: str | None = None,
+        publish_interval: float = DRIFT_PUBLISH_INTERVAL_SECONDS,
+        max_age: float = DRIFT_SNAPSHOT_MAX_AGE_SECONDS,
+    ):
+        self.monitor = monitor
+        self.sink = sink
+        self.replica_id = replica_id or default_replica_id()
+        self.publish_interval = publish_interval
+        self.max_age = max_age
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        # Sinks assume one writer per replica (one file, one shared-memory slot); publishes are serialized here.
+        self._publish_lock = threading.Lock()
+
+    def publish(self) -> None:
+        with self._publish_lock:
+            try:
+                self.sink.publish(self.replica_id, self.monitor.state())
+            except Exception:  # noqa: BLE001
+                logger.exception("drift_publish_failed", extra={"replica_id": self.replica_id})
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.publish_interval):
+            self.publish()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self.publish()
+        self._thread = threading.Thread(target=self._run, name="exml-drift-publisher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def snapshot(self) -> dict[str, object]:
+        # The live local state is merged directly; publishing is left to the timer thread.
+        merged = self.monitor.state()
+        replicas = 1
+        for replica_id, state in self.sink.collect(self.max_age).items():
+            if replica_id == self.replica_id:
+                continue
+            merged = merged.merge(state)
+            replicas += 1
+        return self.monitor.report(merged, replicas=replicas)
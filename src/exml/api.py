@@ -1,49 +1,85 @@
 from __future__ import annotations
 
 import json
+import logging
+import os
+import random
 from contextlib import asynccontextmanager
+from dataclasses import asdict
 from pathlib import Path
+from typing import Literal
 
 import joblib
 import pandas as pd
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query, Request
 
+from exml.aggregation import DriftAggregator, load_drift_sink
+from exml.background import background_weights
 from exml.config import (
     BACKGROUND_FILENAME,
     DEFAULT_ARTIFACT_DIR,
     METADATA_FILENAME,
     MODEL_FILENAME,
+    PRECISION_DEFAULT,
+    SUBSAMPLE_TREES_DEFAULT,
     TOP_K_DEFAULT,
 )
-from exml.explain import explain_single
-from exml.monitoring import DriftMonitor
+from exml.explain import ExplainMode, compute_shap_values, explain_single
+from exml.monitoring import DriftMonitor, ImportanceTracker
 from exml.observability import configure_logging, install_request_tracing
+from exml.precision import cast_frame, cast_pipeline, resolve_precision
 from exml.schemas import (
+    AdmissionStatusResponse,
     BreastCancerFeatures,
     ContributionItem,
+    ContributionVector,
     DriftStatusResponse,
     ExplainResponse,
     HealthResponse,
+    ImportanceStatusResponse,
     PredictResponse,
+    WhatIfRequest,
+    WhatIfResponse,
 )
-from exml.security import authorize_request, load_api_keys
+from exml.security import authorize_request, install_admission_control, load_api_keys
+from exml.whatif import resolve_grid, what_if
 
+logger = logging.getLogger("exml.api")
 
-def create_app(artifact_dir: Path | str = DEFAULT_ARTIFACT_DIR) -> FastAPI:
+
+def create_app(
+    artifact_dir: Path | str = DEFAULT_ARTIFACT_DIR,
+    importance_sample_rate: float | None = None,
+    precision: str | None = None,
+) -> FastAPI:
     artifacts = Path(artifact_dir)
+    if importance_sample_rate is None:
+        importance_sample_rate = float(os.getenv("EXML_IMPORTANCE_SAMPLE_RATE", "0"))
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):
         try:
-            app.state.pipeline = joblib.load(artifacts / MODEL_FILENAME)
-            app.state.background = joblib.load(artifacts / BACKGROUND_FILENAME)
             app.state.metadata = json.loads((artifacts / METADATA_FILENAME).read_text(encoding="utf-8"))
+            app.state.precision = resolve_precision(app.state.metadata, override=precision)
+            app.state.pipeline = cast_pipeline(joblib.load(artifacts / MODEL_FILENAME), app.state.precision)
+            app.state.background = cast_frame(joblib.load(artifacts / BACKGROUND_FILENAME), app.state.precision)
+            app.state.background_weights = background_weights(app.state.metadata)
             baseline_stats = app.state.metadata.get("feature_baseline", {})
-            app.state.drift_monitor = DriftMonitor(baseline_stats=baseline_stats)
+            app.state.drift_monitor = DriftMonitor(baseline_stats=baseline_stats, dtype=app.state.precision)
+            drift_sink = load_drift_sink(n_features=len(baseline_stats))
+            if drift_sink is not None:
+                app.state.drift_aggregator = DriftAggregator(monitor=app.state.drift_monitor, sink=drift_sink)
+                app.state.drift_aggregator.start()
+            app.state.importance_tracker = ImportanceTracker(
+                feature_names=app.state.metadata["feature_names"],
+                baseline_importance=app.state.metadata.get("global_importance", {}),
+            )
             app.state.load_error = None
         except Exception as exc:  # noqa: BLE001
             app.state.load_error = str(exc)
         yield
+        if app.state.drift_aggregator is not None:
+            app.state.drift_aggregator.stop()
 
     configure_logging()
     app = FastAPI(title="Explainable ML Predictor", version="0.2.0", lifespan=lifespan)
@@ -52,9 +88,14 @@ def create_app(artifact_dir: Path | str = DEFAULT_ARTIFACT_DIR) -> FastAPI:
     app.state.pipeline = None
     app.state.metadata = None
     app.state.background = None
+    app.state.background_weights = None
+    app.state.precision = PRECISION_DEFAULT
     app.state.load_error = None
     app.state.api_keys = load_api_keys()
+    install_admission_control(app)
     app.state.drift_monitor = DriftMonitor(baseline_stats={})
+    app.state.drift_aggregator = None
+    app.state.importance_tracker = ImportanceTracker(feature_names=[], baseline_importance={})
 
     def _ensure_model_loaded() -> None:
         if app.state.pipeline is None or app.state.metadata is None or app.state.background is None:
@@ -66,39 +107,78 @@ def create_app(artifact_dir: Path | str = DEFAULT_ARTIFACT_DIR) -> FastAPI:
                 detail = f"{detail} Loader error: {app.state.load_error}"
             raise HTTPException(status_code=503, detail=detail)
 
+    def _payload_frame(data: dict[str, float]) -> pd.DataFrame:
+        frame = pd.DataFrame([data])[app.state.metadata["feature_names"]]
+        return cast_frame(frame, app.state.precision)
+
+    def _track_sampled_importance(frame: pd.DataFrame) -> None:
+        try:
+            result = compute_shap_values(
+                pipeline=app.state.pipeline,
+                background_df=app.state.background,
+                input_df=frame,
+                model_name=app.state.metadata["model_name"],
+                background_weights=app.state.background_weights,
+            )
+            app.state.importance_tracker.update(result.values[0], source="sampled_predict")
+        except Exception:  # noqa: BLE001
+            logger.exception("importance_sampling_failed")
+
     @app.get("/health", response_model=HealthResponse)
     def health() -> HealthResponse:
         loaded = app.state.pipeline is not None and app.state.metadata is not None
         return HealthResponse(status="ok" if loaded else "not_ready", model_loaded=loaded)
 
     @app.post("/predict", response_model=PredictResponse)
-    def predict(payload: BreastCancerFeatures, request: Request) -> PredictResponse:
+    def predict(payload: BreastCancerFeatures, request: Request, background_tasks: BackgroundTasks) -> PredictResponse:
         _ensure_model_loaded()
         authorize_request(request, {"predictor", "admin"})
         data = payload.model_dump(by_alias=True)
-        frame = pd.DataFrame([data])[app.state.metadata["feature_names"]]
+        frame = _payload_frame(data)
         app.state.drift_monitor.update(frame)
         predicted_class = int(app.state.pipeline.predict(frame)[0])
         predicted_probability = float(app.state.pipeline.predict_proba(frame)[0, 1])
+        if importance_sample_rate > 0 and random.random() < importance_sample_rate:  # nosec B311
+            background_tasks.add_task(_track_sampled_importance, frame)
         return PredictResponse(
             predicted_class=predicted_class,
             predicted_probability=predicted_probability,
         )
 
     @app.post("/explain", response_model=ExplainResponse)
-    def explain(payload: BreastCancerFeatures, request: Request) -> ExplainResponse:
+    def explain(
+        payload: BreastCancerFeatures,
+        request: Request,
+        mode: ExplainMode = "exact",
+        top_k: int = Query(TOP_K_DEFAULT, ge=1),
+        full: bool = False,
+        trees: int = Query(SUBSAMPLE_TREES_DEFAULT, ge=2),
+    ) -> ExplainResponse:
         _ensure_model_loaded()
         authorize_request(request, {"admin"})
         data = payload.model_dump(by_alias=True)
-        frame = pd.DataFrame([data])[app.state.metadata["feature_names"]]
+        frame = _payload_frame(data)
         app.state.drift_monitor.update(frame)
         explanation = explain_single(
             pipeline=app.state.pipeline,
             background_df=app.state.background,
             input_df=frame,
             model_name=app.state.metadata["model_name"],
-            top_k=TOP_K_DEFAULT,
+            top_k=top_k,
+            background_weights=app.state.background_weights,
+            mode=mode,
+            n_trees=trees,
         )
+        # The baseline is exact SHAP; approximate and subsampled contributions would bias the shift score.
+        if explanation.mode == "exact":
+            app.state.importance_tracker.update(explanation.contribution_vector)
+        all_contributions = None
+        if full:
+            all_contributions = ContributionVector(
+                features=explanation.feature_names.tolist(),
+                values=explanation.feature_values.tolist(),
+                contributions=explanation.contribution_vector.tolist(),
+            )
         return ExplainResponse(
             base_value=explanation.base_value,
             predicted_probability=explanation.predicted_probability,
@@ -110,15 +190,55 @@ def create_app(artifact_dir: Path | str = DEFAULT_ARTIFACT_DIR) -> FastAPI:
                 )
                 for item in explanation.contributions
             ],
+            mode=explanation.mode,
+            error_estimate=explanation.error_estimate,
+            all_contributions=all_contributions,
         )
 
+    @app.post("/whatif", response_model=WhatIfResponse)
+    def whatif(payload: WhatIfRequest, request: Request) -> WhatIfResponse:
+        _ensure_model_loaded()
+        authorize_request(request, {"predictor", "admin"})
+        data = payload.row.model_dump(by_alias=True)
+        frame = _payload_frame(data)
+        try:
+            grids = [
+                resolve_grid(item.feature, values=item.values, start=item.start, stop=item.stop, steps=item.steps)
+                for item in payload.grid
+            ]
+            result = what_if(
+                pipeline=app.state.pipeline,
+                input_df=frame,
+                grids=grids,
+                background_df=app.state.background if payload.partial_dependence else None,
+                background_weights=app.state.background_weights,
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc)) from exc
+        return WhatIfResponse(**asdict(result))
+
     @app.get("/monitoring/drift", response_model=DriftStatusResponse)
-    def drift_status(request: Request) -> DriftStatusResponse:
+    def drift_status(request: Request, scope: Literal["cluster", "local"] = "cluster") -> DriftStatusResponse:
         _ensure_model_loaded()
         authorize_request(request, {"admin"})
-        snapshot = app.state.drift_monitor.snapshot()
+        if scope == "cluster" and app.state.drift_aggregator is not None:
+            snapshot = app.state.drift_aggregator.snapshot()
+        else:
+            snapshot = app.state.drift_monitor.snapshot()
         return DriftStatusResponse(**snapshot)
 
+    @app.get("/monitoring/importance", response_model=ImportanceStatusResponse)
+    def importance_status(request: Request) -> ImportanceStatusResponse:
+        _ensure_model_loaded()
+        authorize_request(request, {"admin"})
+        snapshot = app.state.importance_tracker.snapshot()
+        return ImportanceStatusResponse(**snapshot)
+
+    @app.get("/monitoring/admission", response_model=AdmissionStatusResponse)
+    def admission_status(request: Request) -> AdmissionStatusResponse:
+        authorize_request(request, {"admin"})
+        return AdmissionStatusResponse(principals=app.state.admission.snapshot())
+
     return app
 
 
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+
+from exml.config import BACKGROUND_REFERENCE_SIZE, BACKGROUND_SIZE_DEFAULT
+from exml.explain import compute_shap_values
+
+BACKGROUND_METHODS = ("kmeans", "stratified", "full")
+
+
+@dataclass
+class BackgroundSummary:
+    data: pd.DataFrame
+    weights: np.ndarray
+    method: str
+
+
+def _uniform(frame: pd.DataFrame, method: str) -> BackgroundSummary:
+    weights = np.full(len(frame), 1.0 / max(len(frame), 1))
+    return BackgroundSummary(data=frame.reset_index(drop=True), weights=weights, method=method)
+
+
+def _stratified_sample(X: pd.DataFrame, y: pd.Series, size: int, random_state: int) -> pd.DataFrame:
+    if size >= len(X):
+        return X
+    try:
+        sample, _ = train_test_split(X, train_size=size, stratify=y, random_state=random_state)
+    except ValueError:
+        # Too few rows per class for a stratified draw at this size; fall back to a plain random draw.
+        sample = X.sample(n=size, random_state=random_state)
+    return sample
+
+
+def _kmeans_summary(
+    X: pd.DataFrame,
+    size: int,
+    random_state: int,
+    sample_weight: np.ndarray | None = None,
+) -> BackgroundSummary:
+    # Cluster in standardized space so large-scale features (e.g. areas) do not dominate the distance,
+    # then report each centroid as the raw-space mean of its members, weighted by cluster share.
+    values = X.to_numpy(dtype=float)
+    row_weights = np.ones(len(values)) if sample_weight is None else np.asarray(sample_weight, dtype=float)
+    scale = values.std(axis=0)
+    scale[scale == 0] = 1.0
+    scaled = (values - values.mean(axis=0)) / scale
+    labels = KMeans(n_clusters=size, n_init=4, random_state=random_state).fit_predict(
+        scaled, sample_weight=row_weights
+    )
+
+    mass = np.bincount(labels, weights=row_weights, minlength=size)
+    occupied = np.flatnonzero(mass)
+    centroids = np.vstack(
+        [np.average(values[labels == cluster], axis=0, weights=row_weights[labels == cluster]) for cluster in occupied]
+    )
+    weights = mass[occupied] / mass.sum()
+    return BackgroundSummary(
+        data=pd.DataFrame(centroids, columns=X.columns),
+        weights=weights.astype(float),
+        method="kmeans",
+    )
+
+
+def summarize_background(
+    X: pd.DataFrame,
+    y: pd.Series,
+    method: str = "kmeans",
+    size: int = BACKGROUND_SIZE_DEFAULT,
+    random_state: int = 42,
+) -> BackgroundSummary:
+    if method not in BACKGROUND_METHODS:
+        raise ValueError(f"background method must be one of: {', '.join(BACKGROUND_METHODS)}")
+    if size < 1:
+        raise ValueError("background size must be >= 1")
+
+    if method == "full" or size >= len(X):
+        return _uniform(X, method)
+    if method == "stratified":
+        return _uniform(_stratified_sample(X, y, size, random_state), method)
+    return _kmeans_summary(X, size, random_state)
+
+
+def merge_backgrounds(
+    old: BackgroundSummary,
+    old_rows: int,
+    new: BackgroundSummary,
+    new_rows: int,
+    size: int,
+    random_state: int = 42,
+) -> BackgroundSummary:
+    """Combine two summaries in proportion to the rows they represent, re-summarizing down to ``size`` rows.
+
+    Lets retraining update the background without the original training rows: k-means backgrounds are
+    re-clustered with the combined weights, sampled backgrounds are re-drawn in proportion to them.
+    """
+    data = pd.concat([old.data, new.data[old.data.columns]], ignore_index=True)
+    total = max(old_rows + new_rows, 1)
+    weights = np.concatenate([old.weights * old_rows / total, new.weights * new_rows / total])
+    weights = weights / weights.sum()
+
+    if old.method == "full" or len(data) <= size:
+        return BackgroundSummary(data=data, weights=weights, method=old.method)
+    if old.method == "kmeans":
+        return _kmeans_summary(data, size, random_state, sample_weight=weights)
+    rng = np.random.default_rng(random_state)
+    chosen = np.sort(rng.choice(len(data), size=size, replace=False, p=weights))
+    return _uniform(data.iloc[chosen], old.method)
+
+
+def background_weights(metadata: dict[str, Any]) -> np.ndarray | None:
+    weights = metadata.get("background", {}).get("weights")
+    if weights is None:
+        return None
+    return np.asarray(weights, dtype=float)
+
+
+def measure_explanation_drift(
+    pipeline: Pipeline,
+    summary: BackgroundSummary,
+    reference_df: pd.DataFrame,
+    eval_df: pd.DataFrame,
+    model_name: str,
+    reference_weights: np.ndarray | None = None,
+) -> dict[str, float] | None:
+    """Compare SHAP values under the summarized background against a large-background reference.
+
+    Returns ``None`` for models whose explainer does not consume the background (path-dependent tree SHAP).
+    """
+    if model_name == "rf":
+        return None
+
+    summary_result = compute_shap_values(
+        pipeline=pipeline,
+        background_df=summary.data,
+        input_df=eval_df,
+        model_name=model_name,
+        background_weights=summary.weights,
+    )
+    reference_result = compute_shap_values(
+        pipeline=pipeline,
+        background_df=reference_df,
+        input_df=eval_df,
+        model_name=model_name,
+        background_weights=reference_weights,
+    )
+
+    delta = np.abs(summary_result.values - reference_result.values)
+    reference_mass = float(np.abs(reference_result.values).sum())
+    return {
+        "reference_rows": len(reference_df),
+        "eval_rows": len(eval_df),
+        "mean_abs_error": float(delta.mean()),
+        "max_abs_error": float(delta.max()),
+        "relative_l1": float(delta.sum() / reference_mass) if reference_mass > 0 else 0.0,
+        "base_value_delta": float(abs(summary_result.base_value - reference_result.base_value)),
+    }
+
+
+def reference_background(X: pd.DataFrame, y: pd.Series, random_state: int = 42) -> pd.DataFrame:
+    return _stratified_sample(X, y, BACKGROUND_REFERENCE_SIZE, random_state)
+
+
+def retrain_reference(
+    old: BackgroundSummary,
+    old_rows: int,
+    X_new: pd.DataFrame,
+    y_new: pd.Series,
+    random_state: int = 42,
+) -> BackgroundSummary:
+    """Reference for a retrained model's background, covering the same population as the merged summary.
+
+    The original rows are gone, so the old summary stands in for them next to a large sample of the new rows,
+    each side weighted by the rows it represents. The measured error is then summarization error only, not
+    the shift between old and new data.
+    """
+    new = _uniform(reference_background(X_new, y_new, random_state), "stratified")
+    return merge_backgrounds(old, old_rows, new, len(X_new), size=len(old.data) + len(new.data))
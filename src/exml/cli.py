@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import argparse
 import json
+from dataclasses import asdict
 from pathlib import Path
 
 import joblib
@@ -9,25 +10,36 @@ import pandas as pd
 import uvicorn
 
 from exml.api import create_app
+from exml.background import BACKGROUND_METHODS, background_weights
 from exml.config import (
     BACKGROUND_FILENAME,
+    BACKGROUND_METHOD_DEFAULT,
+    BACKGROUND_SIZE_DEFAULT,
     DEFAULT_ARTIFACT_DIR,
     DEFAULT_HOST,
     DEFAULT_PORT,
     METADATA_FILENAME,
     MODEL_FILENAME,
+    PRECISION_DEFAULT,
+    RETRAIN_EXTRA_TREES_DEFAULT,
+    SUBSAMPLE_TREES_DEFAULT,
 )
 from exml.data import load_default_dataset
-from exml.explain import explain_single
+from exml.explain import EXPLAIN_MODES, explain_single
+from exml.precision import PRECISIONS, cast_frame, cast_pipeline, resolve_precision
+from exml.retrain import retrain_and_save
 from exml.train import train_and_save
+from exml.whatif import FeatureGrid, resolve_grid, what_if
 
 
 def _load_local_artifacts(artifact_dir: str):
+    # Same loading and casting as the API lifespan, so the CLI and the server run identical numerics.
     artifacts = Path(artifact_dir)
-    pipeline = joblib.load(artifacts / MODEL_FILENAME)
-    background = joblib.load(artifacts / BACKGROUND_FILENAME)
     metadata = json.loads((artifacts / METADATA_FILENAME).read_text(encoding="utf-8"))
-    return pipeline, background, metadata
+    precision = resolve_precision(metadata)
+    pipeline = cast_pipeline(joblib.load(artifacts / MODEL_FILENAME), precision)
+    background = cast_frame(joblib.load(artifacts / BACKGROUND_FILENAME), precision)
+    return pipeline, background, metadata, precision
 
 
 def cmd_train(args: argparse.Namespace) -> None:
@@ -36,9 +48,33 @@ def cmd_train(args: argparse.Namespace) -> None:
         out_dir=args.out,
         csv_path=args.csv,
         target_column=args.target,
+        background_method=args.background_method,
+        background_size=args.background_size,
+        precision=args.precision,
     )
     print("Training complete")
     print(json.dumps(metadata["metrics"], indent=2))
+    background = metadata["background"]
+    print(f"Background: {background['method']} ({background['size']} rows)")
+    if background["explanation_drift"] is None:
+        print("Explanation drift vs reference background: n/a (tree explainer does not use the background)")
+    else:
+        print("Explanation drift vs reference background:")
+        print(json.dumps(background["explanation_drift"], indent=2))
+
+
+def cmd_retrain(args: argparse.Namespace) -> None:
+    metadata = retrain_and_save(
+        artifact_dir=args.artifacts,
+        csv_path=args.csv,
+        out_dir=args.out,
+        target_column=args.target,
+        extra_trees=args.extra_trees,
+        replace_oldest=args.replace_oldest,
+    )
+    print(f"Retraining complete: version {metadata['version']} written to {metadata['artifact_dir']}")
+    print(f"Training time: {metadata['training_seconds']}s")
+    print(json.dumps({**metadata["metrics"], **metadata["retrain"]}, indent=2))
 
 
 def cmd_sample_json(_: argparse.Namespace) -> None:
@@ -47,9 +83,9 @@ def cmd_sample_json(_: argparse.Namespace) -> None:
 
 
 def cmd_predict(args: argparse.Namespace) -> None:
-    pipeline, _, metadata = _load_local_artifacts(args.artifacts)
+    pipeline, _, metadata, precision = _load_local_artifacts(args.artifacts)
     payload = json.loads(args.json)
-    frame = pd.DataFrame([payload])[metadata["feature_names"]]
+    frame = cast_frame(pd.DataFrame([payload])[metadata["feature_names"]], precision)
     result = {
         "predicted_class": int(pipeline.predict(frame)[0]),
         "predicted_probability": float(pipeline.predict_proba(frame)[0, 1]),
@@ -58,15 +94,18 @@ def cmd_predict(args: argparse.Namespace) -> None:
 
 
 def cmd_explain(args: argparse.Namespace) -> None:
-    pipeline, background, metadata = _load_local_artifacts(args.artifacts)
+    pipeline, background, metadata, precision = _load_local_artifacts(args.artifacts)
     payload = json.loads(args.json)
-    frame = pd.DataFrame([payload])[metadata["feature_names"]]
+    frame = cast_frame(pd.DataFrame([payload])[metadata["feature_names"]], precision)
     result = explain_single(
         pipeline=pipeline,
         background_df=background,
         input_df=frame,
         model_name=metadata["model_name"],
         top_k=args.top_k,
+        background_weights=background_weights(metadata),
+        mode=args.mode,
+        n_trees=args.trees,
     )
     print(
         json.dumps(
@@ -74,14 +113,43 @@ def cmd_explain(args: argparse.Namespace) -> None:
                 "base_value": result.base_value,
                 "predicted_probability": result.predicted_probability,
                 "top_contributions": result.contributions,
+                "mode": result.mode,
+                "error_estimate": result.error_estimate,
             },
             indent=2,
         )
     )
 
 
+def _parse_grid(spec: str) -> FeatureGrid:
+    feature, sep, grid = spec.rpartition("=")
+    if not sep or not feature:
+        raise argparse.ArgumentTypeError(f"Invalid grid '{spec}'; use FEATURE=v1,v2,... or FEATURE=start:stop:steps")
+    try:
+        if ":" in grid:
+            start, stop, steps = grid.split(":")
+            return resolve_grid(feature, start=float(start), stop=float(stop), steps=int(steps))
+        return resolve_grid(feature, values=[float(value) for value in grid.split(",")])
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from exc
+
+
+def cmd_whatif(args: argparse.Namespace) -> None:
+    pipeline, background, metadata, precision = _load_local_artifacts(args.artifacts)
+    payload = json.loads(args.json)
+    frame = cast_frame(pd.DataFrame([payload])[metadata["feature_names"]], precision)
+    result = what_if(
+        pipeline=pipeline,
+        input_df=frame,
+        grids=args.grid,
+        background_df=background if args.partial_dependence else None,
+        background_weights=background_weights(metadata),
+    )
+    print(json.dumps(asdict(result), indent=2))
+
+
 def cmd_serve(args: argparse.Namespace) -> None:
-    app = create_app(args.artifacts)
+    app = create_app(args.artifacts, precision=args.precision)
     uvicorn.run(app, host=args.host, port=args.port)
 
 
@@ -94,12 +162,25 @@ def build_parser() -> argparse.ArgumentParser:
     train_parser.add_argument("--out", default=str(DEFAULT_ARTIFACT_DIR))
     train_parser.add_argument("--csv", default=None)
     train_parser.add_argument("--target", default=None)
+    train_parser.add_argument("--background-method", choices=BACKGROUND_METHODS, default=BACKGROUND_METHOD_DEFAULT)
+    train_parser.add_argument("--background-size", type=int, default=BACKGROUND_SIZE_DEFAULT)
+    train_parser.add_argument("--precision", choices=PRECISIONS, default=PRECISION_DEFAULT)
     train_parser.set_defaults(func=cmd_train)
 
+    retrain_parser = subparsers.add_parser("retrain", help="Warm-start an existing model on newly labelled data")
+    retrain_parser.add_argument("--artifacts", default=str(DEFAULT_ARTIFACT_DIR))
+    retrain_parser.add_argument("--csv", required=True)
+    retrain_parser.add_argument("--target", default=None)
+    retrain_parser.add_argument("--out", default=None, help="Defaults to a sibling <artifacts>-v<version> directory")
+    retrain_parser.add_argument("--extra-trees", type=int, default=RETRAIN_EXTRA_TREES_DEFAULT)
+    retrain_parser.add_argument("--replace-oldest", action="store_true")
+    retrain_parser.set_defaults(func=cmd_retrain)
+
     serve_parser = subparsers.add_parser("serve", help="Run FastAPI service")
     serve_parser.add_argument("--artifacts", default=str(DEFAULT_ARTIFACT_DIR))
     serve_parser.add_argument("--host", default=DEFAULT_HOST)
     serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--precision", choices=PRECISIONS, default=None, help="Defaults to the trained precision")
     serve_parser.set_defaults(func=cmd_serve)
 
     predict_parser = subparsers.add_parser("predict", help="Predict one sample from JSON payload")
@@ -111,8 +192,23 @@ def build_parser() -> argparse.ArgumentParser:
     explain_parser.add_argument("--json", required=True)
     explain_parser.add_argument("--artifacts", default=str(DEFAULT_ARTIFACT_DIR))
     explain_parser.add_argument("--top-k", type=int, default=10)
+    explain_parser.add_argument("--mode", choices=EXPLAIN_MODES, default="exact")
+    explain_parser.add_argument("--trees", type=int, default=SUBSAMPLE_TREES_DEFAULT)
     explain_parser.set_defaults(func=cmd_explain)
 
+    whatif_parser = subparsers.add_parser("whatif", help="Score a feature grid for one sample (ICE/PD)")
+    whatif_parser.add_argument("--json", required=True)
+    whatif_parser.add_argument("--artifacts", default=str(DEFAULT_ARTIFACT_DIR))
+    whatif_parser.add_argument(
+        "--grid",
+        type=_parse_grid,
+        action="append",
+        required=True,
+        help="FEATURE=v1,v2,... or FEATURE=start:stop:steps; repeat for a second feature",
+    )
+    whatif_parser.add_argument("--partial-dependence", action="store_true")
+    whatif_parser.set_defaults(func=cmd_whatif)
+
     sample_parser = subparsers.add_parser("sample-json", help="Print a valid sample payload")
     sample_parser.set_defaults(func=cmd_sample_json)
 
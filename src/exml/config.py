@@ -7,3 +7,21 @@ BACKGROUND_FILENAME = "background.joblib"
 DEFAULT_HOST = "0.0.0.0"  # nosec B104
 DEFAULT_PORT = 8000
 TOP_K_DEFAULT = 10
+BACKGROUND_METHOD_DEFAULT = "kmeans"
+BACKGROUND_SIZE_DEFAULT = 100
+BACKGROUND_REFERENCE_SIZE = 1000
+SUBSAMPLE_TREES_DEFAULT = 60
+WHATIF_MAX_FEATURES = 2
+WHATIF_MAX_GRID_POINTS = 400
+WHATIF_MAX_PD_ROWS = 50_000
+DRIFT_HISTOGRAM_BINS = 12
+DRIFT_PUBLISH_INTERVAL_SECONDS = 5.0
+DRIFT_SNAPSHOT_MAX_AGE_SECONDS = 60.0
+DRIFT_SHM_SLOTS = 64
+RETRAIN_EXTRA_TREES_DEFAULT = 100
+PRECISION_DEFAULT = "float64"
+# Per-role admission defaults; individual keys can override them in EXML_API_KEYS. None disables a limit.
+ADMISSION_ROLE_DEFAULTS: dict[str, dict[str, float | None]] = {
+    "admin": {"rate_per_second": 20.0, "burst": 40.0, "max_in_flight": 4},
+    "predictor": {"rate_per_second": 100.0, "burst": 200.0, "max_in_flight": 32},
+}
@@ -1,13 +1,20 @@
 from __future__ import annotations
 
+import copy
+import weakref
 from dataclasses import dataclass
-from typing import TypedDict
+from typing import Any, Literal, TypedDict, get_args
 
 import numpy as np
 import pandas as pd
 import shap
 from sklearn.pipeline import Pipeline
 
+from exml.config import SUBSAMPLE_TREES_DEFAULT
+
+ExplainMode = Literal["exact", "approximate", "subsample"]
+EXPLAIN_MODES: tuple[str, ...] = get_args(ExplainMode)
+
 
 class Contribution(TypedDict):
     feature: str
@@ -19,7 +26,74 @@ class Contribution(TypedDict):
 class PredictionExplanation:
     base_value: float
     predicted_probability: float
-    contributions: list[Contribution]
+    feature_names: pd.Index
+    feature_values: np.ndarray
+    contribution_vector: np.ndarray
+    top_indices: np.ndarray
+    mode: str = "exact"
+    error_estimate: float | None = None
+
+    @property
+    def contributions(self) -> list[Contribution]:
+        """Top-k contributions ordered by decreasing magnitude; only the selected features are materialized."""
+        return [
+            {
+                "feature": str(self.feature_names[index]),
+                "value": float(self.feature_values[index]),
+                "contribution": float(self.contribution_vector[index]),
+            }
+            for index in self.top_indices
+        ]
+
+
+@dataclass
+class BatchExplanation:
+    base_value: float
+    predicted_probabilities: np.ndarray
+    feature_names: pd.Index
+    feature_values: np.ndarray
+    contributions: np.ndarray
+    top_indices: np.ndarray
+    mode: str = "exact"
+    stderr: np.ndarray | None = None
+
+    def row(self, index: int) -> PredictionExplanation:
+        return PredictionExplanation(
+            base_value=self.base_value,
+            predicted_probability=float(self.predicted_probabilities[index]),
+            feature_names=self.feature_names,
+            feature_values=self.feature_values[index],
+            contribution_vector=self.contributions[index],
+            top_indices=self.top_indices[index],
+            mode=self.mode,
+            error_estimate=None if self.stderr is None else float(self.stderr[index]),
+        )
+
+
+@dataclass
+class ShapResult:
+    values: np.ndarray
+    base_value: float
+    mode: str
+    stderr: np.ndarray | None = None
+
+
+def top_k_indices(contributions: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the ``top_k`` largest |contribution| along the last axis, ordered by decreasing magnitude.
+
+    ``argpartition`` selects the candidates in O(features); only the k selected entries are sorted.
+    Works for a single contribution vector or a (rows, features) batch.
+    """
+    magnitude = np.abs(contributions)
+    n_features = magnitude.shape[-1]
+    k = min(max(top_k, 0), n_features)
+    if k < n_features:
+        selected = np.argpartition(-magnitude, k, axis=-1)[..., :k]
+    else:
+        selected = np.broadcast_to(np.arange(n_features), magnitude.shape)
+    order = np.argsort(-np.take_along_axis(magnitude, selected, axis=-1), axis=-1, kind="stable")
+    indices: np.ndarray = np.take_along_axis(selected, order, axis=-1)
+    return indices
 
 
 def _binary_shap_values(raw_shap_values) -> np.ndarray:
@@ -33,50 +107,203 @@ def _binary_shap_values(raw_shap_values) -> np.ndarray:
     return arr
 
 
-def explain_single(
+def _background_moments(background_transformed, weights: np.ndarray | None) -> tuple[np.ndarray, np.ndarray]:
+    matrix = np.asarray(background_transformed, dtype=float)
+    mean = np.average(matrix, axis=0, weights=weights)
+    if matrix.shape[0] < 2:
+        return mean, np.zeros((matrix.shape[1], matrix.shape[1]))
+    cov = np.atleast_2d(np.cov(matrix, rowvar=False, aweights=weights))
+    return mean, cov
+
+
+# Building a TreeExplainer converts every tree and costs far more than scoring one row, so explainers are
+# cached per fitted model (and per tree subset) for as long as the model object is alive.
+_TREE_EXPLAINERS: weakref.WeakKeyDictionary[Any, dict[int, Any]] = weakref.WeakKeyDictionary()
+
+
+def _tree_subset(model, stop: int):
+    subset = copy.copy(model)
+    subset.estimators_ = model.estimators_[:stop]
+    subset.n_estimators = len(subset.estimators_)
+    return subset
+
+
+def _tree_explainer(model, n_trees: int) -> Any:
+    cached = _TREE_EXPLAINERS.setdefault(model, {})
+    if n_trees not in cached:
+        target = model if n_trees >= len(model.estimators_) else _tree_subset(model, n_trees)
+        cached[n_trees] = shap.TreeExplainer(target)
+    return cached[n_trees]
+
+
+@dataclass
+class _StackedTrees:
+    """Node arrays of every tree in a forest concatenated, so all trees can be traversed in one vectorized loop."""
+
+    roots: np.ndarray
+    depths: np.ndarray
+    left: np.ndarray
+    right: np.ndarray
+    feature: np.ndarray
+    threshold: np.ndarray
+    probability: np.ndarray
+
+    @classmethod
+    def from_forest(cls, model) -> _StackedTrees:
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        left, right, feature, threshold, probability = [], [], [], [], []
+        for offset, tree in zip(offsets[:-1], trees, strict=True):
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left < 0
+            # Leaves point at themselves, so rows that reach a leaf early stay there until the deepest tree is done.
+            left.append(np.where(leaf, nodes, tree.children_left) + offset)
+            right.append(np.where(leaf, nodes, tree.children_right) + offset)
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(np.where(leaf, np.inf, tree.threshold))
+            value = tree.value[:, 0, :]
+            probability.append(value[:, -1] / value.sum(axis=1))
+        return cls(
+            roots=offsets[:-1],
+            depths=np.array([tree.max_depth for tree in trees]),
+            left=np.concatenate(left),
+            right=np.concatenate(right),
+            feature=np.concatenate(feature),
+            threshold=np.concatenate(threshold),
+            probability=np.concatenate(probability),
+        )
+
+    def leaf_probabilities(self, X: np.ndarray, n_trees: int) -> np.ndarray:
+        rows = np.arange(X.shape[0])[None, :]
+        nodes = np.broadcast_to(self.roots[:n_trees, None], (n_trees, X.shape[0]))
+        for _ in range(int(self.depths[:n_trees].max())):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        leaves: np.ndarray = self.probability[nodes]
+        return leaves
+
+
+_TREE_NODES: weakref.WeakKeyDictionary[Any, _StackedTrees] = weakref.WeakKeyDictionary()
+
+
+def _subsample_stderr(model, input_transformed, n_trees: int) -> np.ndarray:
+    """Standard error of the summed contributions of each row when averaging the first ``n_trees`` trees.
+
+    Each tree's contributions add up to its prediction minus its expected value (the root value), so the
+    spread of that difference across the selected trees estimates how far the subset mean is from the full
+    forest. Only leaf lookups are needed, no extra SHAP pass. The finite population correction accounts for
+    drawing the trees without replacement from the full forest.
+    """
+    if model not in _TREE_NODES:
+        _TREE_NODES[model] = _StackedTrees.from_forest(model)
+    stacked = _TREE_NODES[model]
+    # Trees split on float32 features, so compare in float32 like sklearn's own traversal.
+    X = np.asarray(input_transformed, dtype=np.float32)
+    deltas = stacked.leaf_probabilities(X, n_trees) - stacked.probability[stacked.roots[:n_trees], None]
+    total_trees = len(stacked.roots)
+    fpc = np.sqrt((total_trees - n_trees) / max(total_trees - 1, 1))
+    stderr: np.ndarray = deltas.std(axis=0, ddof=1) / np.sqrt(n_trees) * fpc
+    return stderr
+
+
+def _tree_shap(model, input_transformed, mode: str, n_trees: int) -> ShapResult:
+    total_trees = len(model.estimators_)
+    subsample = mode == "subsample" and n_trees < total_trees
+    if subsample and n_trees < 2:
+        raise ValueError("subsample mode needs at least 2 trees")
+
+    explainer = _tree_explainer(model, n_trees if subsample else total_trees)
+    approximate = mode == "approximate"
+    shap_values = _binary_shap_values(explainer.shap_values(input_transformed, approximate=approximate))
+    return ShapResult(
+        values=shap_values,
+        base_value=float(np.array(explainer.expected_value).reshape(-1)[-1]),
+        mode="subsample" if subsample else ("approximate" if approximate else "exact"),
+        stderr=_subsample_stderr(model, input_transformed, n_trees) if subsample else None,
+    )
+
+
+def compute_shap_values(
     pipeline: Pipeline,
     background_df: pd.DataFrame,
     input_df: pd.DataFrame,
     model_name: str,
-    top_k: int = 10,
-) -> PredictionExplanation:
+    background_weights: np.ndarray | None = None,
+    mode: str = "exact",
+    n_trees: int = SUBSAMPLE_TREES_DEFAULT,
+) -> ShapResult:
+    if mode not in EXPLAIN_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(EXPLAIN_MODES)}")
+
     preprocess = pipeline.named_steps["preprocess"]
     model = pipeline.named_steps["model"]
 
-    background_transformed = preprocess.transform(background_df)
     input_transformed = preprocess.transform(input_df)
 
     if model_name == "rf":
-        explainer = shap.TreeExplainer(model)
-        shap_values = _binary_shap_values(explainer.shap_values(input_transformed))
-        expected = explainer.expected_value
-    else:
-        explainer = shap.LinearExplainer(model, background_transformed)
-        shap_values = _binary_shap_values(explainer.shap_values(input_transformed))
-        expected = explainer.expected_value
-
-    contributions_vector = shap_values[0]
-    base_value = float(np.array(expected).reshape(-1)[-1])
-    predicted_probability = float(pipeline.predict_proba(input_df)[0, 1])
-
-    items: list[Contribution] = []
-    for feature_name, feature_value, contribution in zip(
-        input_df.columns,
-        input_df.iloc[0].values,
-        contributions_vector,
-        strict=True,
-    ):
-        items.append(
-            {
-                "feature": str(feature_name),
-                "value": float(feature_value),
-                "contribution": float(contribution),
-            }
-        )
+        return _tree_shap(model, input_transformed, mode, n_trees)
 
-    items.sort(key=lambda row: abs(row["contribution"]), reverse=True)
-    return PredictionExplanation(
-        base_value=base_value,
-        predicted_probability=predicted_probability,
-        contributions=items[:top_k],
+    # Linear SHAP is already exact and closed-form, so every mode resolves to the exact computation. It runs in
+    # float64 whatever the serving precision: the arithmetic is negligible next to preprocessing, and float32
+    # moments only added conversions without saving time.
+    background_transformed = preprocess.transform(background_df)
+    explainer = shap.LinearExplainer(model, _background_moments(background_transformed, background_weights))
+    shap_values = _binary_shap_values(explainer.shap_values(input_transformed))
+    return ShapResult(
+        values=shap_values,
+        base_value=float(np.array(explainer.expected_value).reshape(-1)[-1]),
+        mode="exact",
     )
+
+
+def explain_batch(
+    pipeline: Pipeline,
+    background_df: pd.DataFrame,
+    input_df: pd.DataFrame,
+    model_name: str,
+    top_k: int = 10,
+    background_weights: np.ndarray | None = None,
+    mode: str = "exact",
+    n_trees: int = SUBSAMPLE_TREES_DEFAULT,
+) -> BatchExplanation:
+    result = compute_shap_values(
+        pipeline=pipeline,
+        background_df=background_df,
+        input_df=input_df,
+        model_name=model_name,
+        background_weights=background_weights,
+        mode=mode,
+        n_trees=n_trees,
+    )
+    return BatchExplanation(
+        base_value=result.base_value,
+        predicted_probabilities=pipeline.predict_proba(input_df)[:, 1],
+        feature_names=input_df.columns,
+        feature_values=input_df.to_numpy(),
+        contributions=result.values,
+        top_indices=top_k_indices(result.values, top_k),
+        mode=result.mode,
+        stderr=result.stderr,
+    )
+
+
+def explain_single(
+    pipeline: Pipeline,
+    background_df: pd.DataFrame,
+    input_df: pd.DataFrame,
+    model_name: str,
+    top_k: int = 10,
+    background_weights: np.ndarray | None = None,
+    mode: str = "exact",
+    n_trees: int = SUBSAMPLE_TREES_DEFAULT,
+) -> PredictionExplanation:
+    return explain_batch(
+        pipeline=pipeline,
+        background_df=background_df,
+        input_df=input_df.iloc[:1],
+        model_name=model_name,
+        top_k=top_k,
+        background_weights=background_weights,
+        mode=mode,
+        n_trees=n_trees,
+    ).row(0)
@@ -1,54 +1,270 @@
 from __future__ import annotations
 
 import logging
-from collections import deque
+import threading
+from dataclasses import dataclass
 
+import numpy as np
 import pandas as pd
 
+from exml.config import DRIFT_HISTOGRAM_BINS
+
 logger = logging.getLogger("exml.monitoring")
 
 
+def histogram_edges(mean: np.ndarray, std: np.ndarray, bins: int = DRIFT_HISTOGRAM_BINS) -> np.ndarray:
+    """Interior bin edges per feature: ``bins - 2`` equal-width bins over mean +/- 3 std plus two open tails.
+
+    Edges depend only on the baseline, so every worker and replica bins identically and histograms merge exactly.
+    """
+    offsets = np.linspace(-3.0, 3.0, bins - 1)
+    scale = np.maximum(np.asarray(std, dtype=float), 1e-6)
+    edges: np.ndarray = np.asarray(mean, dtype=float)[:, None] + scale[:, None] * offsets
+    return edges
+
+
+def baseline_edges(baseline_stats: dict[str, dict], features: list[str]) -> np.ndarray:
+    """Histogram edges stored with the baseline; older artifacts without them get edges rebuilt from mean/std."""
+    if features and all("edges" in baseline_stats[name] for name in features):
+        return np.array([baseline_stats[name]["edges"] for name in features], dtype=float)
+    means = np.array([float(baseline_stats[name]["mean"]) for name in features])
+    stds = np.array([float(baseline_stats[name]["std"] or 1e-6) for name in features])
+    return histogram_edges(means, stds)
+
+
+def bin_counts(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Histogram counts of shape (features, bins) for a (rows, features) matrix."""
+    matrix = np.atleast_2d(values)
+    indices = (matrix[:, :, None] > edges[None, :, :]).sum(axis=2)
+    one_hot = indices[:, :, None] == np.arange(edges.shape[1] + 1)
+    counts: np.ndarray = one_hot.sum(axis=0).astype(float)
+    return counts
+
+
+@dataclass
+class DriftState:
+    """Mergeable drift sufficient statistics: combining two states is exact element-wise addition."""
+
+    count: int
+    sums: np.ndarray
+    sumsq: np.ndarray
+    histogram: np.ndarray
+
+    @classmethod
+    def empty(cls, n_features: int, bins: int = DRIFT_HISTOGRAM_BINS) -> DriftState:
+        return cls(
+            count=0,
+            sums=np.zeros(n_features),
+            sumsq=np.zeros(n_features),
+            histogram=np.zeros((n_features, bins)),
+        )
+
+    @classmethod
+    def from_rows(cls, rows: np.ndarray, edges: np.ndarray) -> DriftState:
+        matrix = np.atleast_2d(np.asarray(rows, dtype=float))
+        return cls(
+            count=matrix.shape[0],
+            sums=matrix.sum(axis=0),
+            sumsq=np.square(matrix).sum(axis=0),
+            histogram=bin_counts(matrix, edges),
+        )
+
+    def merge(self, other: DriftState) -> DriftState:
+        if self.histogram.shape != other.histogram.shape:
+            raise ValueError("Cannot merge drift states with different feature or bin layouts")
+        return DriftState(
+            count=self.count + other.count,
+            sums=self.sums + other.sums,
+            sumsq=self.sumsq + other.sumsq,
+            histogram=self.histogram + other.histogram,
+        )
+
+    def to_vector(self) -> np.ndarray:
+        return np.concatenate([[float(self.count)], self.sums, self.sumsq, self.histogram.reshape(-1)])
+
+    @classmethod
+    def from_vector(cls, vector: np.ndarray, n_features: int, bins: int = DRIFT_HISTOGRAM_BINS) -> DriftState:
+        vector = np.asarray(vector, dtype=float)
+        return cls(
+            count=int(round(vector[0])),
+            sums=vector[1 : 1 + n_features].copy(),
+            sumsq=vector[1 + n_features : 1 + 2 * n_features].copy(),
+            histogram=vector[1 + 2 * n_features :].reshape(n_features, bins).copy(),
+        )
+
+    @staticmethod
+    def vector_size(n_features: int, bins: int = DRIFT_HISTOGRAM_BINS) -> int:
+        return 1 + n_features * (2 + bins)
+
+
+def _psi(current: np.ndarray, baseline: np.ndarray) -> float:
+    current = np.clip(current / max(current.sum(), 1e-12), 1e-6, None)
+    baseline = np.clip(baseline / max(baseline.sum(), 1e-12), 1e-6, None)
+    return float(np.sum((current - baseline) * np.log(current / baseline)))
+
+
 class DriftMonitor:
-    def __init__(self, baseline_stats: dict[str, dict[str, float]], window_size: int = 200, z_threshold: float = 3.0):
+    def __init__(
+        self,
+        baseline_stats: dict[str, dict[str, float]],
+        window_size: int = 200,
+        z_threshold: float = 3.0,
+        dtype: str = "float64",
+    ):
         self.baseline_stats = baseline_stats
         self.window_size = window_size
         self.z_threshold = z_threshold
-        self._window: deque[dict[str, float]] = deque(maxlen=window_size)
+        self.features = list(baseline_stats)
+        self._baseline_mean = np.array([float(baseline_stats[name]["mean"]) for name in self.features])
+        self._baseline_std = np.array([float(baseline_stats[name]["std"] or 1e-6) for name in self.features])
+        self.edges = baseline_edges(baseline_stats, self.features)
+        # Ring buffer of raw rows; the window statistics are maintained incrementally (add new row, subtract
+        # evicted row) and recomputed from the buffer once per lap to keep floating-point error bounded. The buffer
+        # may be float32 to halve its footprint; the accumulated statistics always stay float64.
+        self._buffer = np.zeros((window_size, len(self.features)), dtype=dtype)
+        self._next = 0
+        self._filled = 0
+        self._state = DriftState.empty(len(self.features))
+        self._lock = threading.Lock()
 
     def update(self, frame: pd.DataFrame) -> None:
-        self._window.append(frame.iloc[0].to_dict())
+        row = frame[self.features].to_numpy(dtype=self._buffer.dtype)[0]
+        added = DriftState.from_rows(row, self.edges)
+        with self._lock:
+            if self._filled == self.window_size:
+                evicted = DriftState.from_rows(self._buffer[self._next], self.edges)
+                self._state = DriftState(
+                    count=self._state.count - 1,
+                    sums=self._state.sums - evicted.sums,
+                    sumsq=self._state.sumsq - evicted.sumsq,
+                    histogram=self._state.histogram - evicted.histogram,
+                )
+            else:
+                self._filled += 1
+            self._buffer[self._next] = row
+            self._state = self._state.merge(added)
+            self._next = (self._next + 1) % self.window_size
+            if self._next == 0:
+                self._state = DriftState.from_rows(self._buffer, self.edges)
+
+    @property
+    def window_nbytes(self) -> int:
+        return int(self._buffer.nbytes)
+
+    def state(self) -> DriftState:
+        with self._lock:
+            return self._state
 
     def snapshot(self) -> dict[str, object]:
-        if not self._window:
-            return {"status": "warming_up", "window_size": 0, "alerts": []}
+        return self.report(self.state())
 
-        window_df = pd.DataFrame(self._window)
+    def report(self, state: DriftState, replicas: int | None = None) -> dict[str, object]:
+        if state.count == 0:
+            return {"status": "warming_up", "window_size": 0, "alerts": [], "replicas": replicas}
+
+        current_means = state.sums / state.count
+        z_scores = (current_means - self._baseline_mean) / np.maximum(self._baseline_std, 1e-6)
         alerts: list[dict[str, float | str]] = []
-        for feature, stats in self.baseline_stats.items():
-            if feature not in window_df.columns:
-                continue
-            baseline_mean = float(stats["mean"])
-            baseline_std = float(stats["std"] or 1e-6)
-            current_mean = float(window_df[feature].mean())
-            z_score = float((current_mean - baseline_mean) / max(baseline_std, 1e-6))
-            if abs(z_score) >= self.z_threshold:
-                alerts.append(
-                    {
-                        "feature": feature,
-                        "baseline_mean": round(baseline_mean, 6),
-                        "current_mean": round(current_mean, 6),
-                        "z_score": round(z_score, 4),
-                    }
-                )
+        for index in np.flatnonzero(np.abs(z_scores) >= self.z_threshold):
+            alert: dict[str, float | str] = {
+                "feature": self.features[index],
+                "baseline_mean": round(float(self._baseline_mean[index]), 6),
+                "current_mean": round(float(current_means[index]), 6),
+                "z_score": round(float(z_scores[index]), 4),
+            }
+            baseline_histogram = self.baseline_stats[self.features[index]].get("histogram")
+            if baseline_histogram is not None:
+                alert["psi"] = round(_psi(state.histogram[index], np.asarray(baseline_histogram, dtype=float)), 4)
+            alerts.append(alert)
 
         status = "drift_detected" if alerts else "stable"
         if alerts:
-            logger.warning("drift_alert", extra={"alerts": alerts, "window_size": len(self._window)})
+            logger.warning("drift_alert", extra={"alerts": alerts, "window_size": state.count})
 
         return {
             "status": status,
-            "window_size": len(self._window),
+            "window_size": state.count,
             "alerts": alerts,
             "z_threshold": self.z_threshold,
             "tracked_features": len(self.baseline_stats),
+            "replicas": replicas,
+        }
+
+
+class ImportanceTracker:
+    """Running global SHAP importance over live explanations.
+
+    Keeps fixed-size per-feature sums so each update is O(features) and memory does not grow with traffic.
+    """
+
+    def __init__(
+        self,
+        feature_names: list[str],
+        baseline_importance: dict[str, float],
+        shift_threshold: float = 0.2,
+        min_count: int = 20,
+    ):
+        self.feature_names = list(feature_names)
+        self.shift_threshold = shift_threshold
+        self.min_count = min_count
+        self._baseline = np.array([float(baseline_importance.get(name, 0.0)) for name in self.feature_names])
+        self._abs_sum = np.zeros(len(self.feature_names))
+        self._signed_sum = np.zeros(len(self.feature_names))
+        self._count = 0
+        self._sources: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def update(self, contributions: np.ndarray, source: str = "explain") -> None:
+        matrix = np.atleast_2d(np.asarray(contributions, dtype=float))
+        abs_total = np.abs(matrix).sum(axis=0)
+        signed_total = matrix.sum(axis=0)
+        with self._lock:
+            self._abs_sum += abs_total
+            self._signed_sum += signed_total
+            self._count += matrix.shape[0]
+            self._sources[source] = self._sources.get(source, 0) + matrix.shape[0]
+
+    def snapshot(self) -> dict[str, object]:
+        with self._lock:
+            abs_sum = self._abs_sum.copy()
+            signed_sum = self._signed_sum.copy()
+            count = self._count
+            sources = dict(self._sources)
+
+        if count == 0:
+            return {"status": "warming_up", "count": 0, "sources": sources, "features": []}
+
+        mean_abs = abs_sum / count
+        signed_mean = signed_sum / count
+        baseline_total = float(self._baseline.sum())
+        # Total-variation distance between the normalized live and training importance profiles (0 = same ranking
+        # weights, 1 = disjoint), so the signal does not depend on the overall contribution scale.
+        importance_shift = None
+        if baseline_total > 0 and mean_abs.sum() > 0:
+            importance_shift = float(0.5 * np.abs(mean_abs / mean_abs.sum() - self._baseline / baseline_total).sum())
+
+        if count < self.min_count or importance_shift is None:
+            status = "warming_up" if count < self.min_count else "no_baseline"
+        elif importance_shift >= self.shift_threshold:
+            status = "shift_detected"
+            logger.warning("importance_shift", extra={"importance_shift": importance_shift, "count": count})
+        else:
+            status = "stable"
+
+        order = np.argsort(-mean_abs)
+        return {
+            "status": status,
+            "count": count,
+            "sources": sources,
+            "importance_shift": None if importance_shift is None else round(importance_shift, 6),
+            "shift_threshold": self.shift_threshold,
+            "features": [
+                {
+                    "feature": self.feature_names[index],
+                    "mean_abs": float(mean_abs[index]),
+                    "signed_mean": float(signed_mean[index]),
+                    "baseline_mean_abs": float(self._baseline[index]),
+                }
+                for index in order
+            ],
         }
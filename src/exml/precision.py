@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import os
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+
+from exml.config import PRECISION_DEFAULT
+
+PRECISIONS = ("float64", "float32")
+
+# Fitted attributes that are plain parameter arrays and safe to store in reduced precision. Tree ensembles are
+# left alone: scikit-learn already evaluates tree thresholds in float32.
+_CASTABLE_ATTRIBUTES = ("coef_", "intercept_", "mean_", "scale_", "var_")
+
+
+def resolve_precision(metadata: dict[str, Any] | None = None, override: str | None = None) -> str:
+    """Serving precision: explicit override, then ``EXML_PRECISION``, then the precision recorded at training."""
+    precision = override or os.getenv("EXML_PRECISION") or (metadata or {}).get("precision") or PRECISION_DEFAULT
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision must be one of: {', '.join(PRECISIONS)}")
+    return precision
+
+
+def cast_pipeline(pipeline: Pipeline, precision: str) -> Pipeline:
+    dtype = np.dtype(precision)
+    for _, step in pipeline.steps:
+        estimators = [step]
+        if hasattr(step, "transformers_"):
+            estimators.extend(transformer for _, transformer, _ in step.transformers_)
+        for estimator in estimators:
+            for attribute in _CASTABLE_ATTRIBUTES:
+                value = getattr(estimator, attribute, None)
+                if isinstance(value, np.ndarray) and value.dtype.kind == "f":
+                    setattr(estimator, attribute, value.astype(dtype))
+    return pipeline
+
+
+def cast_frame(frame: pd.DataFrame, precision: str) -> pd.DataFrame:
+    dtype = np.dtype(precision)
+    if all(column_dtype == dtype for column_dtype in frame.dtypes):
+        return frame
+    return frame.astype(dtype)
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import json
+import re
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+
+from exml.background import (
+    BackgroundSummary,
+    background_weights,
+    measure_explanation_drift,
+    merge_backgrounds,
+    retrain_reference,
+    summarize_background,
+)
+from exml.config import (
+    BACKGROUND_FILENAME,
+    BACKGROUND_SIZE_DEFAULT,
+    METADATA_FILENAME,
+    MODEL_FILENAME,
+    PRECISION_DEFAULT,
+    RETRAIN_EXTRA_TREES_DEFAULT,
+)
+from exml.data import load_dataset
+from exml.features import ensure_feature_order
+from exml.monitoring import baseline_edges, bin_counts
+from exml.precision import cast_frame, cast_pipeline
+from exml.train import background_metadata, evaluate, global_importance, split_dataset, write_artifacts
+
+
+def _grow_forest(pipeline: Pipeline, X: pd.DataFrame, y: pd.Series, extra_trees: int, replace_oldest: bool) -> dict:
+    # The fitted preprocessing step is kept as-is so existing trees and new trees see identical inputs.
+    model = pipeline.named_steps["model"]
+    transformed = pipeline.named_steps["preprocess"].transform(X)
+    previous = len(model.estimators_)
+    model.set_params(warm_start=True, n_estimators=previous + extra_trees)
+    model.fit(transformed, y)
+    replaced = 0
+    if replace_oldest:
+        replaced = min(extra_trees, previous)
+        model.estimators_ = model.estimators_[replaced:]
+        model.set_params(n_estimators=len(model.estimators_))
+    model.set_params(warm_start=False)
+    return {"added_trees": extra_trees, "replaced_trees": replaced, "n_estimators": len(model.estimators_)}
+
+
+def _warm_start_linear(
+    pipeline: Pipeline, X: pd.DataFrame, y: pd.Series, replay: BackgroundSummary, replay_rows: int
+) -> dict:
+    # Refitting on the new rows alone converges to the new-batch optimum whatever the starting point. The original
+    # rows are not stored, so the weighted background stands in for them: each background row enters once per
+    # class, weighted by its share of ``replay_rows`` times the current model's probability for that class. The
+    # loss on those rows is the cross-entropy against the parent model, so the refit trades the new labels off
+    # against what the model already learned in proportion to row counts. The scaler stays fixed so the
+    # existing coefficients keep their meaning.
+    preprocess = pipeline.named_steps["preprocess"]
+    model = pipeline.named_steps["model"]
+    replay_X = preprocess.transform(replay.data[X.columns])
+    probabilities = model.predict_proba(replay_X)
+    mass = replay.weights * replay_rows
+    negative, positive = model.classes_
+
+    X_fit = np.vstack([preprocess.transform(X), replay_X, replay_X])
+    y_fit = np.concatenate(
+        [y.to_numpy(), np.full(len(replay_X), positive), np.full(len(replay_X), negative)]
+    )
+    sample_weight = np.concatenate([np.ones(len(X)), mass * probabilities[:, 1], mass * probabilities[:, 0]])
+    model.set_params(warm_start=True)
+    model.fit(X_fit, y_fit, sample_weight=sample_weight)
+    model.set_params(warm_start=False)
+    return {"iterations": int(np.max(model.n_iter_)), "replay_rows": len(replay_X)}
+
+
+def merge_feature_baseline(baseline: dict[str, dict], baseline_rows: int, X: pd.DataFrame) -> dict[str, dict]:
+    """Fold new rows into the stored per-feature mean/std (exact, parallel-variance update) and histogram."""
+    new_rows = len(X)
+    total = baseline_rows + new_rows
+    new_means = X.mean().to_numpy(dtype=float)
+    new_vars = X.var().fillna(0.0).to_numpy(dtype=float)
+    old_means = np.array([float(baseline[feature]["mean"]) for feature in X.columns])
+    old_vars = np.array([float(baseline[feature]["std"]) ** 2 for feature in X.columns])
+
+    means = (baseline_rows * old_means + new_rows * new_means) / total
+    m2 = (
+        old_vars * max(baseline_rows - 1, 0)
+        + new_vars * max(new_rows - 1, 0)
+        + (old_means - new_means) ** 2 * baseline_rows * new_rows / total
+    )
+    stds = np.sqrt(m2 / max(total - 1, 1))
+    # New rows are binned on the parent's edges so old and new mass share one layout; the edges are carried
+    # forward with the baseline and the drift monitor bins live traffic on them too.
+    edges = baseline_edges(baseline, list(X.columns))
+    new_histograms = bin_counts(X.to_numpy(dtype=float), edges)
+
+    merged: dict[str, dict] = {}
+    for index, feature in enumerate(X.columns):
+        old_histogram = np.asarray(baseline[feature].get("histogram", np.zeros(new_histograms.shape[1])), dtype=float)
+        histogram = (old_histogram * baseline_rows + new_histograms[index]) / total
+        merged[feature] = {
+            "mean": float(means[index]),
+            "std": float(stds[index]),
+            "edges": [float(value) for value in edges[index]],
+            "histogram": [float(value) for value in histogram],
+        }
+    return merged
+
+
+def retrain_and_save(
+    artifact_dir: str,
+    csv_path: str,
+    out_dir: str | None = None,
+    target_column: str | None = None,
+    extra_trees: int = RETRAIN_EXTRA_TREES_DEFAULT,
+    replace_oldest: bool = False,
+) -> dict:
+    artifacts = Path(artifact_dir)
+    pipeline = joblib.load(artifacts / MODEL_FILENAME)
+    background_df = joblib.load(artifacts / BACKGROUND_FILENAME)
+    metadata = json.loads((artifacts / METADATA_FILENAME).read_text(encoding="utf-8"))
+    model_name = metadata["model_name"]
+    feature_names = metadata["feature_names"]
+
+    dataset = load_dataset(csv_path=csv_path, target_column=target_column or metadata["target_name"])
+    X_train, X_val, y_train, y_val = split_dataset(ensure_feature_order(dataset.X, feature_names), dataset.y)
+
+    previous_rows = int(metadata.get("train_rows", len(X_train)))
+    total_rows = previous_rows + len(X_train)
+    previous_background = metadata.get("background", {})
+    old_weights = background_weights(metadata)
+    old_summary = BackgroundSummary(
+        data=background_df.astype(float),
+        weights=np.full(len(background_df), 1.0 / len(background_df)) if old_weights is None else old_weights,
+        method=previous_background.get("method", "stratified"),
+    )
+
+    precision = metadata.get("precision", PRECISION_DEFAULT)
+    cast_pipeline(pipeline, "float64")
+    start = time.perf_counter()
+    if model_name == "rf":
+        update = _grow_forest(pipeline, X_train, y_train, extra_trees, replace_oldest)
+    else:
+        update = _warm_start_linear(pipeline, X_train, y_train, old_summary, previous_rows)
+    training_seconds = time.perf_counter() - start
+    cast_pipeline(pipeline, precision)
+
+    size = int(previous_background.get("size", BACKGROUND_SIZE_DEFAULT))
+    new_summary = summarize_background(X_train, y_train, method=old_summary.method, size=size)
+    background = merge_backgrounds(old_summary, previous_rows, new_summary, len(X_train), size=size)
+    reference = retrain_reference(old_summary, previous_rows, X_train, y_train)
+    explanation_drift = measure_explanation_drift(
+        pipeline=pipeline,
+        summary=background,
+        reference_df=reference.data,
+        eval_df=X_val,
+        model_name=model_name,
+        reference_weights=reference.weights,
+    )
+
+    previous_version = int(metadata.get("version", 1))
+    version = previous_version + 1
+    previous_balance = metadata.get("baseline_class_balance", {"positive": float((y_train == 1).mean())})
+    positive = (previous_balance["positive"] * previous_rows + float((y_train == 1).sum())) / total_rows
+
+    retrained = {
+        **metadata,
+        "version": version,
+        "parent": {"artifact_dir": str(artifacts), "version": previous_version},
+        "train_rows": total_rows,
+        "training_seconds": round(training_seconds, 4),
+        "metrics": evaluate(pipeline, cast_frame(X_val, precision), y_val),
+        "feature_baseline": merge_feature_baseline(metadata["feature_baseline"], previous_rows, X_train),
+        "global_importance": global_importance(pipeline, background, X_val, model_name),
+        "baseline_class_balance": {"negative": 1.0 - positive, "positive": positive},
+        "background": background_metadata(background, explanation_drift),
+        "retrain": {"new_rows": len(X_train), **update},
+    }
+    lineage = re.sub(r"-v\d+$", "", artifacts.resolve().name)
+    out_path = Path(out_dir) if out_dir else artifacts.resolve().with_name(f"{lineage}-v{version}")
+    write_artifacts(out_path, pipeline, background, retrained)
+    retrained["artifact_dir"] = str(out_path)
+    return retrained
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from pydantic import BaseModel, ConfigDict, Field
 
+from exml.config import WHATIF_MAX_FEATURES, WHATIF_MAX_GRID_POINTS
+
 
 class BreastCancerFeatures(BaseModel):
     model_config = ConfigDict(populate_by_name=True, extra="forbid")
@@ -49,10 +51,48 @@ class ContributionItem(BaseModel):
     contribution: float
 
 
+class ContributionVector(BaseModel):
+    """Full contribution vector as parallel arrays, in model feature order."""
+
+    features: list[str]
+    values: list[float]
+    contributions: list[float]
+
+
 class ExplainResponse(BaseModel):
     base_value: float
     predicted_probability: float
     top_contributions: list[ContributionItem]
+    mode: str = "exact"
+    error_estimate: float | None = None
+    all_contributions: ContributionVector | None = None
+
+
+class WhatIfGrid(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    feature: str
+    values: list[float] | None = Field(default=None, min_length=1, max_length=WHATIF_MAX_GRID_POINTS)
+    start: float | None = None
+    stop: float | None = None
+    steps: int | None = Field(default=None, ge=2, le=WHATIF_MAX_GRID_POINTS)
+
+
+class WhatIfRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    row: BreastCancerFeatures
+    grid: list[WhatIfGrid] = Field(min_length=1, max_length=WHATIF_MAX_FEATURES)
+    partial_dependence: bool = False
+
+
+class WhatIfResponse(BaseModel):
+    features: list[str]
+    grid: list[list[float]]
+    shape: list[int]
+    base_probability: float
+    ice: list[float]
+    partial_dependence: list[float] | None = None
 
 
 class HealthResponse(BaseModel):
@@ -65,6 +105,7 @@ class DriftAlert(BaseModel):
     baseline_mean: float
     current_mean: float
     z_score: float
+    psi: float | None = None
 
 
 class DriftStatusResponse(BaseModel):
@@ -73,3 +114,34 @@ class DriftStatusResponse(BaseModel):
     alerts: list[DriftAlert]
     z_threshold: float | None = None
     tracked_features: int | None = None
+    replicas: int | None = None
+
+
+class ImportanceItem(BaseModel):
+    feature: str
+    mean_abs: float
+    signed_mean: float
+    baseline_mean_abs: float
+
+
+class ImportanceStatusResponse(BaseModel):
+    status: str
+    count: int
+    sources: dict[str, int]
+    features: list[ImportanceItem]
+    importance_shift: float | None = None
+    shift_threshold: float | None = None
+
+
+class AdmissionCounters(BaseModel):
+    in_flight: int
+    admitted: int
+    rate_limited: int
+    concurrency_limited: int
+    tokens: float | None = None
+    rate_per_second: float | None = None
+    max_in_flight: int | None = None
+
+
+class AdmissionStatusResponse(BaseModel):
+    principals: dict[str, AdmissionCounters]
@@ -2,22 +2,28 @@ from __future__ import annotations
 
 import json
 import os
-from dataclasses import dataclass
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
 from typing import Any
 
-from fastapi import HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response
+
+from exml.admission import AdmissionController, AdmissionLimits, retry_after_header
+
+_LIMIT_FIELDS = ("rate_per_second", "burst", "max_in_flight")
 
 
 @dataclass(frozen=True)
 class Principal:
     role: str
     key_id: str
+    limits: AdmissionLimits = field(default_factory=AdmissionLimits)
 
 
 def load_api_keys() -> dict[str, Principal]:
     raw = os.getenv("EXML_API_KEYS")
     if raw:
-        mapping: dict[str, dict[str, str]] = json.loads(raw)
+        mapping: dict[str, dict[str, Any]] = json.loads(raw)
     else:
         env = os.getenv("EXML_ENV", "dev").lower()
         if env == "prod":
@@ -32,7 +38,12 @@ def load_api_keys() -> dict[str, Principal]:
         role = data.get("role")
         if role not in {"admin", "predictor"}:
             raise RuntimeError(f"Invalid role configured for API key: {role}")
-        keys[key] = Principal(role=role, key_id=data.get("key_id", key[-6:]))
+        overrides = {name: data[name] for name in _LIMIT_FIELDS if name in data}
+        keys[key] = Principal(
+            role=role,
+            key_id=data.get("key_id", key[-6:]),
+            limits=AdmissionLimits.for_role(role, overrides),
+        )
     return keys
 
 
@@ -56,4 +67,33 @@ def authorize_request(request: Request, allowed_roles: set[str]) -> Principal:
         raise HTTPException(status_code=403, detail="Insufficient permissions")
 
     request.state.principal = f"{principal.key_id}:{principal.role}"
+
+    admission: AdmissionController | None = getattr(request.app.state, "admission", None)
+    if admission is not None:
+        retry_after = admission.acquire(principal.key_id, principal.limits)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests for this API key",
+                headers={"Retry-After": retry_after_header(retry_after)},
+            )
+        request.state.admission_key = principal.key_id
     return principal
+
+
+def install_admission_control(app: FastAPI) -> None:
+    """Attach a per-key admission controller; ``authorize_request`` admits, this middleware releases."""
+    app.state.admission = AdmissionController(
+        (principal.key_id, principal.limits) for principal in app.state.api_keys.values()
+    )
+
+    @app.middleware("http")
+    async def admission_middleware(
+        request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        try:
+            return await call_next(request)
+        finally:
+            key_id = getattr(request.state, "admission_key", None)
+            if key_id is not None:
+                app.state.admission.release(key_id)
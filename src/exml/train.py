@@ -1,69 +1,160 @@
 from __future__ import annotations
 
 import json
+import time
 from pathlib import Path
 
 import joblib
+import numpy as np
+import pandas as pd
 from sklearn.metrics import accuracy_score, roc_auc_score
 from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
 
-from exml.config import BACKGROUND_FILENAME, METADATA_FILENAME, MODEL_FILENAME
+from exml.background import (
+    BackgroundSummary,
+    measure_explanation_drift,
+    reference_background,
+    summarize_background,
+)
+from exml.config import (
+    BACKGROUND_FILENAME,
+    BACKGROUND_METHOD_DEFAULT,
+    BACKGROUND_SIZE_DEFAULT,
+    METADATA_FILENAME,
+    MODEL_FILENAME,
+    PRECISION_DEFAULT,
+)
 from exml.data import load_dataset
+from exml.explain import compute_shap_values
 from exml.model import build_pipeline
+from exml.monitoring import bin_counts, histogram_edges
+from exml.precision import PRECISIONS, cast_frame, cast_pipeline
 
 
-def train_and_save(
-    model_name: str,
-    out_dir: str,
-    csv_path: str | None = None,
-    target_column: str | None = None,
-) -> dict:
-    dataset = load_dataset(csv_path=csv_path, target_column=target_column)
+def split_dataset(X: pd.DataFrame, y: pd.Series) -> tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
     X_train, X_val, y_train, y_val = train_test_split(
-        dataset.X,
-        dataset.y,
+        X,
+        y,
         test_size=0.2,
         random_state=42,
-        stratify=dataset.y,
+        stratify=y,
     )
+    return X_train, X_val, y_train, y_val
 
-    feature_names = list(X_train.columns)
-    pipeline = build_pipeline(model_name=model_name, feature_names=feature_names)
-    pipeline.fit(X_train, y_train)
 
+def evaluate(pipeline: Pipeline, X_val: pd.DataFrame, y_val: pd.Series) -> dict[str, float]:
     val_pred = pipeline.predict(X_val)
     val_proba = pipeline.predict_proba(X_val)[:, 1]
-
-    metrics = {
+    return {
         "accuracy": float(accuracy_score(y_val, val_pred)),
         "roc_auc": float(roc_auc_score(y_val, val_proba)),
     }
 
-    out_path = Path(out_dir)
-    out_path.mkdir(parents=True, exist_ok=True)
 
-    joblib.dump(pipeline, out_path / MODEL_FILENAME)
-    joblib.dump(X_train.head(200), out_path / BACKGROUND_FILENAME)
+def global_importance(
+    pipeline: Pipeline,
+    background: BackgroundSummary,
+    X_val: pd.DataFrame,
+    model_name: str,
+) -> dict[str, float]:
+    validation_shap = compute_shap_values(
+        pipeline=pipeline,
+        background_df=background.data,
+        input_df=X_val,
+        model_name=model_name,
+        background_weights=background.weights,
+    )
+    return dict(
+        zip(X_val.columns, (float(value) for value in np.abs(validation_shap.values).mean(axis=0)), strict=True)
+    )
+
 
-    feature_baseline = {
+def feature_baseline(X: pd.DataFrame) -> dict[str, dict]:
+    means = X.mean().to_numpy(dtype=float)
+    stds = X.std().fillna(0.0).to_numpy(dtype=float)
+    edges = histogram_edges(means, stds)
+    histograms = bin_counts(X.to_numpy(dtype=float), edges)
+    return {
         feature: {
-            "mean": float(X_train[feature].mean()),
-            "std": float(X_train[feature].std() or 0.0),
+            "mean": float(means[index]),
+            "std": float(stds[index] or 0.0),
+            "edges": [float(value) for value in edges[index]],
+            "histogram": [float(value) for value in histograms[index] / len(X)],
         }
-        for feature in feature_names
+        for index, feature in enumerate(X.columns)
     }
 
+
+def background_metadata(background: BackgroundSummary, explanation_drift: dict[str, float] | None) -> dict:
+    return {
+        "method": background.method,
+        "size": len(background.data),
+        "weights": [float(weight) for weight in background.weights],
+        "explanation_drift": explanation_drift,
+    }
+
+
+def write_artifacts(out_dir: str | Path, pipeline: Pipeline, background: BackgroundSummary, metadata: dict) -> None:
+    out_path = Path(out_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+
+    precision = metadata.get("precision", PRECISION_DEFAULT)
+    joblib.dump(cast_pipeline(pipeline, precision), out_path / MODEL_FILENAME)
+    joblib.dump(cast_frame(background.data, precision), out_path / BACKGROUND_FILENAME)
+    (out_path / METADATA_FILENAME).write_text(json.dumps(metadata, indent=2), encoding="utf-8")
+
+
+def train_and_save(
+    model_name: str,
+    out_dir: str,
+    csv_path: str | None = None,
+    target_column: str | None = None,
+    background_method: str = BACKGROUND_METHOD_DEFAULT,
+    background_size: int = BACKGROUND_SIZE_DEFAULT,
+    precision: str = PRECISION_DEFAULT,
+) -> dict:
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision must be one of: {', '.join(PRECISIONS)}")
+    dataset = load_dataset(csv_path=csv_path, target_column=target_column)
+    X_train, X_val, y_train, y_val = split_dataset(dataset.X, dataset.y)
+
+    feature_names = list(X_train.columns)
+    pipeline = build_pipeline(model_name=model_name, feature_names=feature_names)
+    start = time.perf_counter()
+    pipeline.fit(X_train, y_train)
+    training_seconds = time.perf_counter() - start
+
+    # Fitting always runs in float64; reduced precision only applies to the stored parameters and inference.
+    cast_pipeline(pipeline, precision)
+    metrics = evaluate(pipeline, cast_frame(X_val, precision), y_val)
+
+    background = summarize_background(X_train, y_train, method=background_method, size=background_size)
+    explanation_drift = measure_explanation_drift(
+        pipeline=pipeline,
+        summary=background,
+        reference_df=reference_background(X_train, y_train),
+        eval_df=X_val,
+        model_name=model_name,
+    )
+
     metadata = {
         "model_name": model_name,
         "feature_names": feature_names,
         "target_name": dataset.target_name,
+        "version": 1,
+        "precision": precision,
+        "train_rows": len(X_train),
+        "training_seconds": round(training_seconds, 4),
         "metrics": metrics,
-        "feature_baseline": feature_baseline,
+        "feature_baseline": feature_baseline(X_train),
+        "global_importance": global_importance(pipeline, background, X_val, model_name),
         "baseline_class_balance": {
             "negative": float((y_train == 0).mean()),
             "positive": float((y_train == 1).mean()),
         },
+        "background": background_metadata(background, explanation_drift),
     }
-    (out_path / METADATA_FILENAME).write_text(json.dumps(metadata, indent=2), encoding="utf-8")
+    write_artifacts(out_dir, pipeline, background, metadata)
 
     return metadata
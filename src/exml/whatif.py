@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+
+from exml.config import WHATIF_MAX_FEATURES, WHATIF_MAX_GRID_POINTS, WHATIF_MAX_PD_ROWS
+
+
+@dataclass
+class FeatureGrid:
+    feature: str
+    values: np.ndarray
+
+
+@dataclass
+class WhatIfResult:
+    features: list[str]
+    grid: list[list[float]]
+    shape: list[int]
+    base_probability: float
+    ice: list[float]
+    partial_dependence: list[float] | None = None
+
+
+def resolve_grid(
+    feature: str,
+    values: list[float] | None = None,
+    start: float | None = None,
+    stop: float | None = None,
+    steps: int | None = None,
+) -> FeatureGrid:
+    if values is not None:
+        if start is not None or stop is not None or steps is not None:
+            raise ValueError(f"Grid for '{feature}': give either explicit values or start/stop/steps, not both.")
+        grid = np.asarray(values, dtype=float)
+    else:
+        if start is None or stop is None or steps is None:
+            raise ValueError(f"Grid for '{feature}' needs explicit values or all of start, stop and steps.")
+        if steps < 2:
+            raise ValueError(f"Grid for '{feature}' needs at least 2 steps.")
+        grid = np.linspace(start, stop, steps)
+    if grid.size == 0 or not np.all(np.isfinite(grid)):
+        raise ValueError(f"Grid for '{feature}' must contain finite values.")
+    return FeatureGrid(feature=feature, values=grid)
+
+
+def _grid_points(grids: list[FeatureGrid]) -> np.ndarray:
+    # Row-major cartesian product: the first feature varies slowest, matching ``np.reshape(shape)``.
+    mesh = np.meshgrid(*(grid.values for grid in grids), indexing="ij")
+    return np.column_stack([axis.reshape(-1) for axis in mesh])
+
+
+def _validate(grids: list[FeatureGrid], feature_names: list[str]) -> int:
+    if not 1 <= len(grids) <= WHATIF_MAX_FEATURES:
+        raise ValueError(f"What-if supports 1 to {WHATIF_MAX_FEATURES} features per request.")
+    seen = [grid.feature for grid in grids]
+    if len(set(seen)) != len(seen):
+        raise ValueError("What-if features must be distinct.")
+    unknown = [feature for feature in seen if feature not in feature_names]
+    if unknown:
+        raise ValueError(f"Unknown what-if features: {unknown}")
+    n_points = int(np.prod([grid.values.size for grid in grids]))
+    if n_points > WHATIF_MAX_GRID_POINTS:
+        raise ValueError(f"What-if grid has {n_points} points; the limit is {WHATIF_MAX_GRID_POINTS}.")
+    return n_points
+
+
+def what_if(
+    pipeline: Pipeline,
+    input_df: pd.DataFrame,
+    grids: list[FeatureGrid],
+    background_df: pd.DataFrame | None = None,
+    background_weights: np.ndarray | None = None,
+) -> WhatIfResult:
+    """Score every grid point for one row (ICE) with a single ``predict_proba`` call.
+
+    When a background is given, also returns the weighted partial dependence over the background rows,
+    again scored as one batch.
+    """
+    feature_names = list(input_df.columns)
+    n_points = _validate(grids, feature_names)
+    points = _grid_points(grids)
+    columns = [feature_names.index(grid.feature) for grid in grids]
+
+    values = input_df.to_numpy()[:1]
+    # Keep float32 rows in float32, but never write grid points into an integer array, which would truncate them.
+    base = values.astype(np.result_type(values.dtype, np.float32), copy=False)
+    perturbed = np.repeat(base, n_points + 1, axis=0)
+    perturbed[1:, columns] = points
+    probabilities = pipeline.predict_proba(pd.DataFrame(perturbed, columns=feature_names))[:, 1]
+
+    partial_dependence = None
+    if background_df is not None:
+        bg = background_df[feature_names].to_numpy(dtype=base.dtype)
+        if n_points * len(bg) > WHATIF_MAX_PD_ROWS:
+            raise ValueError(
+                f"Partial dependence needs {n_points * len(bg)} rows; the limit is {WHATIF_MAX_PD_ROWS}."
+            )
+        stacked = np.tile(bg, (n_points, 1))
+        stacked[:, columns] = np.repeat(points, len(bg), axis=0)
+        pd_proba = pipeline.predict_proba(pd.DataFrame(stacked, columns=feature_names))[:, 1]
+        curve = np.average(pd_proba.reshape(n_points, len(bg)), axis=1, weights=background_weights)
+        partial_dependence = [float(value) for value in curve]
+
+    return WhatIfResult(
+        features=[grid.feature for grid in grids],
+        grid=[[float(value) for value in grid.values] for grid in grids],
+        shape=[int(grid.values.size) for grid in grids],
+        base_probability=float(probabilities[0]),
+        ice=[float(value) for value in probabilities[1:]],
+        partial_dependence=partial_dependence,
+    )
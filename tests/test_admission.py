@@ -0,0 +1,67 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from exml.admission import AdmissionController, AdmissionLimits
+from exml.api import create_app
+from exml.data import load_default_dataset
+from exml.train import train_and_save
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_and_in_flight_limits():
+    clock = FakeClock()
+    limits = AdmissionLimits(rate_per_second=2.0, burst=2.0, max_in_flight=None)
+    controller = AdmissionController([("k", limits)], clock=clock)
+
+    assert controller.acquire("k", limits) is None
+    assert controller.acquire("k", limits) is None
+    assert controller.acquire("k", limits) == 0.5
+    clock.now = 0.5
+    assert controller.acquire("k", limits) is None
+
+    capped = AdmissionLimits(max_in_flight=1)
+    assert controller.acquire("c", capped) is None
+    assert controller.acquire("c", capped) is not None
+    controller.release("c")
+    assert controller.acquire("c", capped) is None
+
+    counters = controller.snapshot()
+    assert counters["k"]["admitted"] == 3
+    assert counters["k"]["rate_limited"] == 1
+    assert counters["c"]["concurrency_limited"] == 1
+    assert counters["c"]["in_flight"] == 1
+
+
+def test_api_rejects_excess_load_per_principal(tmp_path, monkeypatch):
+    monkeypatch.setenv(
+        "EXML_API_KEYS",
+        json.dumps(
+            {
+                "noisy-key": {"role": "predictor", "key_id": "noisy", "rate_per_second": 0.001, "burst": 2},
+                "quiet-key": {"role": "predictor", "key_id": "quiet"},
+                "admin-key": {"role": "admin", "key_id": "ops"},
+            }
+        ),
+    )
+    train_and_save(model_name="logistic", out_dir=str(tmp_path))
+    sample = load_default_dataset().X.iloc[0].to_dict()
+
+    with TestClient(create_app(tmp_path)) as client:
+        statuses = [client.post("/predict", json=sample, headers={"x-api-key": "noisy-key"}) for _ in range(3)]
+        quiet = client.post("/predict", json=sample, headers={"x-api-key": "quiet-key"})
+        counters = client.get("/monitoring/admission", headers={"x-api-key": "admin-key"}).json()["principals"]
+
+    assert [response.status_code for response in statuses] == [200, 200, 429]
+    assert int(statuses[-1].headers["Retry-After"]) >= 1
+    assert quiet.status_code == 200
+    assert counters["noisy"]["rate_limited"] == 1
+    assert counters["noisy"]["in_flight"] == 0
+    assert counters["quiet"]["admitted"] == 1
@@ -44,3 +44,103 @@ def test_api_auth_and_drift_endpoint(tmp_path):
         assert drift.status_code == 200
         assert drift.json()["window_size"] >= 1
         assert drift.json()["status"] in {"stable", "drift_detected"}
+
+
+def test_api_explain_reports_mode(tmp_path):
+    train_and_save(model_name="logistic", out_dir=str(tmp_path))
+    app = create_app(tmp_path)
+    sample = load_default_dataset().X.iloc[0].to_dict()
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/explain",
+            params={"mode": "approximate"},
+            json=sample,
+            headers={"x-api-key": "dev-admin-key"},
+        )
+        invalid = client.post("/explain", params={"mode": "fast"}, json=sample, headers={"x-api-key": "dev-admin-key"})
+        too_few_trees = client.post(
+            "/explain",
+            params={"mode": "subsample", "trees": 1},
+            json=sample,
+            headers={"x-api-key": "dev-admin-key"},
+        )
+        full = client.post(
+            "/explain",
+            params={"top_k": 3, "full": True},
+            json=sample,
+            headers={"x-api-key": "dev-admin-key"},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["mode"] == "exact"
+    assert len(response.json()["top_contributions"]) == 10
+    assert response.json()["all_contributions"] is None
+    assert invalid.status_code == 422
+    assert too_few_trees.status_code == 422
+
+    body = full.json()
+    assert len(body["top_contributions"]) == 3
+    vector = body["all_contributions"]
+    assert len(vector["features"]) == len(vector["values"]) == len(vector["contributions"]) == 30
+    top = body["top_contributions"][0]
+    assert vector["contributions"][vector["features"].index(top["feature"])] == top["contribution"]
+
+
+def test_api_whatif_returns_curve(tmp_path):
+    train_and_save(model_name="logistic", out_dir=str(tmp_path))
+    app = create_app(tmp_path)
+    sample = load_default_dataset().X.iloc[0].to_dict()
+    body = {
+        "row": sample,
+        "grid": [{"feature": "mean radius", "start": 8, "stop": 20, "steps": 5}],
+        "partial_dependence": True,
+    }
+
+    with TestClient(app) as client:
+        response = client.post("/whatif", json=body, headers={"x-api-key": "dev-predict-key"})
+        unknown = client.post(
+            "/whatif",
+            json={**body, "grid": [{"feature": "not a feature", "values": [1.0]}]},
+            headers={"x-api-key": "dev-predict-key"},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["shape"] == [5]
+    assert len(response.json()["ice"]) == 5
+    assert len(response.json()["partial_dependence"]) == 5
+    assert unknown.status_code == 422
+
+
+def test_api_importance_tracks_explained_and_sampled_requests(tmp_path):
+    train_and_save(model_name="logistic", out_dir=str(tmp_path))
+    app = create_app(tmp_path, importance_sample_rate=1.0)
+    sample = load_default_dataset().X.iloc[0].to_dict()
+    admin = {"x-api-key": "dev-admin-key"}
+
+    with TestClient(app) as client:
+        client.post("/explain", json=sample, headers=admin)
+        client.post("/predict", json=sample, headers={"x-api-key": "dev-predict-key"})
+        response = client.get("/monitoring/importance", headers=admin)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 2
+    assert body["sources"] == {"explain": 1, "sampled_predict": 1}
+    assert body["status"] == "warming_up"
+    assert len(body["features"]) == 30
+    assert body["features"][0]["baseline_mean_abs"] > 0
+
+
+def test_api_importance_ignores_non_exact_explanations(tmp_path):
+    train_and_save(model_name="rf", out_dir=str(tmp_path))
+    app = create_app(tmp_path)
+    sample = load_default_dataset().X.iloc[0].to_dict()
+    admin = {"x-api-key": "dev-admin-key"}
+
+    with TestClient(app) as client:
+        for mode in ("approximate", "subsample", "exact"):
+            client.post("/explain", params={"mode": mode}, json=sample, headers=admin)
+        response = client.get("/monitoring/importance", headers=admin)
+
+    assert response.json()["count"] == 1
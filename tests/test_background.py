@@ -0,0 +1,41 @@
+import numpy as np
+
+from exml.background import retrain_reference, summarize_background
+from exml.data import load_default_dataset
+from exml.train import train_and_save
+
+
+def test_background_methods_respect_size_and_weights():
+    dataset = load_default_dataset()
+
+    for method in ("kmeans", "stratified"):
+        summary = summarize_background(dataset.X, dataset.y, method=method, size=25)
+        assert len(summary.data) <= 25
+        assert len(summary.weights) == len(summary.data)
+        assert np.isclose(summary.weights.sum(), 1.0)
+        assert list(summary.data.columns) == list(dataset.X.columns)
+
+    full = summarize_background(dataset.X, dataset.y, method="full", size=25)
+    assert len(full.data) == len(dataset.X)
+
+
+def test_train_reports_background_explanation_drift(tmp_path):
+    metadata = train_and_save(model_name="logistic", out_dir=str(tmp_path), background_size=20)
+
+    background = metadata["background"]
+    assert background["method"] == "kmeans"
+    assert len(background["weights"]) == background["size"] <= 20
+    drift = background["explanation_drift"]
+    assert drift["eval_rows"] > 0
+    assert drift["relative_l1"] < 0.5
+
+
+def test_retrain_reference_weights_old_summary_by_row_count():
+    dataset = load_default_dataset()
+    old = summarize_background(dataset.X.iloc[:300], dataset.y.iloc[:300], method="kmeans", size=20)
+
+    reference = retrain_reference(old, 300, dataset.X.iloc[300:], dataset.y.iloc[300:])
+
+    assert len(reference.data) == 20 + len(dataset.X) - 300
+    assert np.isclose(reference.weights.sum(), 1.0)
+    assert np.isclose(reference.weights[:20].sum(), 300 / len(dataset.X))
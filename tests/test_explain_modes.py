@@ -0,0 +1,63 @@
+import joblib
+import numpy as np
+
+from exml.data import load_default_dataset
+from exml.explain import compute_shap_values, explain_single, top_k_indices
+from exml.train import train_and_save
+
+
+def test_rf_explain_modes_report_mode_and_error(tmp_path):
+    train_and_save(model_name="rf", out_dir=str(tmp_path))
+    pipeline = joblib.load(tmp_path / "pipeline.joblib")
+    background = joblib.load(tmp_path / "background.joblib")
+    row = load_default_dataset().X.iloc[[0]]
+
+    results = {
+        mode: explain_single(pipeline, background, row, model_name="rf", top_k=30, mode=mode)
+        for mode in ("exact", "approximate", "subsample")
+    }
+
+    assert results["exact"].mode == "exact"
+    assert results["exact"].error_estimate is None
+    assert results["approximate"].mode == "approximate"
+    assert results["subsample"].mode == "subsample"
+    assert results["subsample"].error_estimate is not None
+
+    for explanation in results.values():
+        total = explanation.base_value + sum(item["contribution"] for item in explanation.contributions)
+        assert np.isclose(total, explanation.predicted_probability, atol=0.05)
+
+    exact_top = {item["feature"] for item in results["exact"].contributions[:3]}
+    approx_top = {item["feature"] for item in results["approximate"].contributions[:5]}
+    assert exact_top & approx_top
+
+
+def test_subsample_error_estimate_covers_gap_to_full_forest(tmp_path):
+    train_and_save(model_name="rf", out_dir=str(tmp_path))
+    pipeline = joblib.load(tmp_path / "pipeline.joblib")
+    rows = load_default_dataset().X.iloc[:100]
+
+    exact = compute_shap_values(pipeline, rows, rows, "rf", mode="exact")
+    subsample = compute_shap_values(pipeline, rows, rows, "rf", mode="subsample", n_trees=60)
+    total_trees = len(pipeline.named_steps["model"].estimators_)
+    subset_only = compute_shap_values(pipeline, rows, rows, "rf", mode="subsample", n_trees=total_trees)
+
+    assert subsample.stderr is not None and subsample.stderr.shape == (len(rows),)
+    assert subset_only.mode == "exact" and subset_only.stderr is None
+    gap = np.abs(
+        exact.values.sum(axis=1) + exact.base_value - subsample.values.sum(axis=1) - subsample.base_value
+    )
+    assert np.mean(gap <= 3 * subsample.stderr + 1e-9) >= 0.8
+
+
+def test_top_k_indices_matches_full_sort_for_rows_and_batches():
+    rng = np.random.default_rng(7)
+    batch = rng.normal(size=(4, 500))
+
+    selected = top_k_indices(batch, 10)
+
+    assert selected.shape == (4, 10)
+    for row, indices in zip(batch, selected, strict=True):
+        assert list(indices) == list(np.argsort(-np.abs(row), kind="stable")[:10])
+    assert list(top_k_indices(batch[0], 10)) == list(selected[0])
+    assert top_k_indices(batch[0], 1000).shape == (500,)
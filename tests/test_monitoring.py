@@ -0,0 +1,168 @@
+import multiprocessing
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from exml.aggregation import DirectorySink, DriftAggregator, SharedMemorySink, TieredSink
+from exml.monitoring import DriftMonitor, DriftState, ImportanceTracker
+
+
+def test_importance_tracker_flags_shifted_profile():
+    tracker = ImportanceTracker(["a", "b"], {"a": 1.0, "b": 1.0}, min_count=4)
+    tracker.update(np.array([[0.5, -0.5], [-0.5, 0.5]]))
+    tracker.update(np.array([0.5, 0.5]))
+    tracker.update(np.array([-0.5, -0.5]))
+
+    stable = tracker.snapshot()
+    assert stable["status"] == "stable"
+    assert stable["count"] == 4
+    assert stable["features"][0]["signed_mean"] == 0.0
+
+    for _ in range(20):
+        tracker.update(np.array([2.0, 0.0]))
+    shifted = tracker.snapshot()
+    assert shifted["status"] == "shift_detected"
+    assert shifted["features"][0]["feature"] == "a"
+    assert shifted["importance_shift"] >= 0.2
+
+
+def _baseline(features, mean=0.0, std=1.0):
+    return {feature: {"mean": mean, "std": std} for feature in features}
+
+
+def test_drift_window_state_is_exact_and_mergeable():
+    rng = np.random.default_rng(0)
+    rows = rng.normal(size=(25, 3))
+    monitor = DriftMonitor(_baseline(["a", "b", "c"]), window_size=10)
+    for row in rows:
+        monitor.update(pd.DataFrame([row], columns=["a", "b", "c"]))
+
+    expected = DriftState.from_rows(rows[-10:], monitor.edges)
+    state = monitor.state()
+    assert state.count == 10
+    assert np.allclose(state.sums, expected.sums)
+    assert np.allclose(state.sumsq, expected.sumsq)
+    assert np.array_equal(state.histogram, expected.histogram)
+
+    left = DriftState.from_rows(rows[:12], monitor.edges)
+    right = DriftState.from_rows(rows[12:], monitor.edges)
+    merged = left.merge(right)
+    assert merged.count == 25
+    assert np.allclose(merged.sums, rows.sum(axis=0))
+    assert np.array_equal(merged.histogram, DriftState.from_rows(rows, monitor.edges).histogram)
+
+
+def test_directory_sink_aggregates_replicas(tmp_path):
+    features = ["a", "b"]
+    stable = DriftMonitor(_baseline(features))
+    shifted = DriftMonitor(_baseline(features))
+    for _ in range(10):
+        stable.update(pd.DataFrame([[0.0, 0.0]], columns=features))
+        shifted.update(pd.DataFrame([[8.0, 0.0]], columns=features))
+
+    sink = DirectorySink(tmp_path, n_features=2)
+    DriftAggregator(shifted, sink, replica_id="replica-b").publish()
+    report = DriftAggregator(stable, sink, replica_id="replica-a").snapshot()
+
+    assert stable.snapshot()["status"] == "stable"
+    assert report["replicas"] == 2
+    assert report["window_size"] == 20
+    assert report["status"] == "drift_detected"
+    assert report["alerts"][0]["feature"] == "a"
+    assert report["alerts"][0]["current_mean"] == 4.0
+
+
+def test_idle_replica_stays_in_cluster_view(tmp_path):
+    features = ["a", "b"]
+    stable = DriftMonitor(_baseline(features))
+    shifted = DriftMonitor(_baseline(features))
+    for _ in range(10):
+        stable.update(pd.DataFrame([[0.0, 0.0]], columns=features))
+        shifted.update(pd.DataFrame([[8.0, 0.0]], columns=features))
+
+    sink = DirectorySink(tmp_path, n_features=2)
+    idle = DriftAggregator(shifted, sink, replica_id="replica-b", publish_interval=0.05, max_age=0.3)
+    idle.start()
+    try:
+        # The shifted replica receives no more traffic; its timer alone must keep its snapshot fresh.
+        time.sleep(0.6)
+        report = DriftAggregator(stable, sink, replica_id="replica-a", max_age=0.3).snapshot()
+    finally:
+        idle.stop()
+
+    assert report["replicas"] == 2
+    assert report["status"] == "drift_detected"
+
+
+def test_directory_sink_survives_concurrent_publishes(tmp_path):
+    sink = DirectorySink(tmp_path, n_features=2)
+    state = DriftState.from_rows(np.array([[1.0, 2.0]]), np.zeros((2, 11)))
+    errors: list[BaseException] = []
+
+    def publish_many():
+        try:
+            for _ in range(200):
+                sink.publish("replica-a", state)
+        except BaseException as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    threads = [threading.Thread(target=publish_many) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sink.collect(max_age=60)["replica-a"].count == 1
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_tiered_sink_publishes_host_state_and_skips_own_host(tmp_path):
+    state = DriftState.from_rows(np.array([[1.0, 2.0], [3.0, 4.0]]), np.zeros((2, 11)))
+    remote = DirectorySink(tmp_path, n_features=2)
+    blocks = [SharedMemorySink(f"exml-test-{uuid.uuid4().hex[:8]}", n_features=2) for _ in range(2)]
+    try:
+        host_a = TieredSink(blocks[0], remote, host_id="host-a")
+        host_b = TieredSink(blocks[1], remote, host_id="host-b")
+        host_a.publish("host-a-1", state)
+        host_b.publish("host-b-1", state)
+
+        seen_from_a = host_a.collect(max_age=60)
+    finally:
+        for block in blocks:
+            block.unlink()
+
+    assert list(seen_from_a) == ["host-b"]
+    assert seen_from_a["host-b"].count == 2
+    assert sorted(path.stem for path in tmp_path.glob("*.json")) == ["host-a", "host-b"]
+
+
+def _publish_from_worker(name, ready, done):
+    sink = SharedMemorySink(name, n_features=2)
+    sink.publish("worker", DriftState.from_rows(np.array([[1.0, 2.0], [3.0, 4.0]]), np.zeros((2, 11))))
+    ready.set()
+    done.wait(timeout=30)
+
+
+def test_shared_memory_sink_collects_other_workers():
+    name = f"exml-test-{uuid.uuid4().hex[:8]}"
+    sink = SharedMemorySink(name, n_features=2)
+    context = multiprocessing.get_context("spawn")
+    ready, done = context.Event(), context.Event()
+    worker = context.Process(target=_publish_from_worker, args=(name, ready, done))
+    worker.start()
+    try:
+        assert ready.wait(timeout=30)
+        states = sink.collect(max_age=60)
+    finally:
+        done.set()
+        worker.join(timeout=30)
+        sink.unlink()
+
+    assert len(states) == 1
+    (state,) = states.values()
+    assert state.count == 2
+    assert np.allclose(state.sums, [4.0, 6.0])
@@ -0,0 +1,70 @@
+import joblib
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from exml.api import create_app
+from exml.cli import _load_local_artifacts
+from exml.data import load_default_dataset
+from exml.explain import explain_batch
+from exml.monitoring import DriftMonitor
+from exml.train import train_and_save
+
+
+def _load(path):
+    return joblib.load(path / "pipeline.joblib"), joblib.load(path / "background.joblib")
+
+
+def test_float32_matches_float64_within_tolerance(tmp_path):
+    X = load_default_dataset().X
+    for model_name in ("logistic", "rf"):
+        train_and_save(model_name=model_name, out_dir=str(tmp_path / f"{model_name}64"))
+        train_and_save(model_name=model_name, out_dir=str(tmp_path / f"{model_name}32"), precision="float32")
+        pipeline64, background64 = _load(tmp_path / f"{model_name}64")
+        pipeline32, background32 = _load(tmp_path / f"{model_name}32")
+        assert (background32.dtypes == np.float32).all()
+
+        batch64 = explain_batch(pipeline64, background64, X, model_name=model_name)
+        batch32 = explain_batch(pipeline32, background32, X.astype(np.float32), model_name=model_name)
+
+        assert np.max(np.abs(batch32.predicted_probabilities - batch64.predicted_probabilities)) < 1e-4
+        assert np.max(np.abs(batch32.contributions - batch64.contributions)) < 1e-3
+        assert abs(batch32.base_value - batch64.base_value) < 1e-4
+
+
+def test_float32_drift_buffer_keeps_exact_window_statistics():
+    rng = np.random.default_rng(1)
+    rows = rng.normal(loc=100.0, scale=10.0, size=(30, 2))
+    baseline = {name: {"mean": 100.0, "std": 10.0} for name in ("a", "b")}
+    monitor = DriftMonitor(baseline, window_size=8, dtype="float32")
+    for row in rows:
+        monitor.update(pd.DataFrame([row], columns=["a", "b"]))
+
+    state = monitor.state()
+    assert np.allclose(state.sums, rows[-8:].astype(np.float32).astype(float).sum(axis=0))
+    assert state.sums.dtype == np.float64
+
+
+def test_api_serves_float32_when_requested(tmp_path):
+    train_and_save(model_name="logistic", out_dir=str(tmp_path))
+    sample = load_default_dataset().X.iloc[0].to_dict()
+    headers = {"x-api-key": "dev-admin-key"}
+
+    with TestClient(create_app(tmp_path)) as client:
+        reference = client.post("/explain", json=sample, headers=headers).json()
+    with TestClient(create_app(tmp_path, precision="float32")) as client:
+        reduced = client.post("/explain", json=sample, headers=headers).json()
+
+    assert abs(reduced["predicted_probability"] - reference["predicted_probability"]) < 1e-4
+    assert reduced["top_contributions"][0]["feature"] == reference["top_contributions"][0]["feature"]
+
+
+def test_cli_loads_artifacts_in_serving_precision(tmp_path, monkeypatch):
+    train_and_save(model_name="logistic", out_dir=str(tmp_path))
+    monkeypatch.setenv("EXML_PRECISION", "float32")
+
+    pipeline, background, _, precision = _load_local_artifacts(str(tmp_path))
+
+    assert precision == "float32"
+    assert (background.dtypes == np.float32).all()
+    assert pipeline.named_steps["model"].coef_.dtype == np.float32
@@ -0,0 +1,75 @@
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+
+from exml.data import load_default_dataset
+from exml.monitoring import DriftMonitor
+from exml.retrain import retrain_and_save
+from exml.train import split_dataset, train_and_save
+
+
+def _write_new_batch(path):
+    dataset = load_default_dataset()
+    dataset.X.assign(target=dataset.y).sample(n=200, random_state=3).to_csv(path, index=False)
+
+
+def test_retrain_rf_grows_and_replaces_trees(tmp_path):
+    train_and_save(model_name="rf", out_dir=str(tmp_path / "base"))
+    _write_new_batch(tmp_path / "new.csv")
+
+    metadata = retrain_and_save(
+        str(tmp_path / "base"),
+        str(tmp_path / "new.csv"),
+        extra_trees=50,
+        replace_oldest=True,
+    )
+
+    out_dir = tmp_path / "base-v2"
+    assert metadata["artifact_dir"] == str(out_dir.resolve())
+    saved = json.loads((out_dir / "metadata.json").read_text(encoding="utf-8"))
+    assert saved["version"] == 2
+    assert saved["parent"]["version"] == 1
+    assert saved["train_rows"] == 455 + 160
+    assert saved["retrain"] == {"new_rows": 160, "added_trees": 50, "replaced_trees": 50, "n_estimators": 300}
+    assert saved["metrics"]["roc_auc"] > 0.9
+    assert len(joblib.load(out_dir / "pipeline.joblib").named_steps["model"].estimators_) == 300
+
+
+def test_retrain_linear_updates_baseline_and_background(tmp_path):
+    base = train_and_save(model_name="logistic", out_dir=str(tmp_path / "base"), background_size=30)
+    _write_new_batch(tmp_path / "new.csv")
+
+    metadata = retrain_and_save(str(tmp_path / "base"), str(tmp_path / "new.csv"), out_dir=str(tmp_path / "next"))
+
+    assert metadata["metrics"]["roc_auc"] > 0.9
+    assert metadata["background"]["size"] <= 30
+    assert abs(sum(metadata["background"]["weights"]) - 1.0) < 1e-9
+    assert metadata["feature_baseline"]["mean radius"]["mean"] != base["feature_baseline"]["mean radius"]["mean"]
+    # Old and new histogram mass share the parent's bin layout, which the drift monitor then uses as-is.
+    merged = metadata["feature_baseline"]["mean radius"]
+    assert merged["edges"] == base["feature_baseline"]["mean radius"]["edges"]
+    assert np.isclose(sum(merged["histogram"]), 1.0)
+    assert np.allclose(DriftMonitor(metadata["feature_baseline"]).edges[0], merged["edges"])
+    assert metadata["background"]["explanation_drift"]["reference_rows"] > metadata["background"]["size"]
+    assert len(joblib.load(tmp_path / "next" / "background.joblib")) == metadata["background"]["size"]
+
+
+def test_retrain_linear_keeps_what_the_parent_learned(tmp_path):
+    train_and_save(model_name="logistic", out_dir=str(tmp_path / "base"))
+    _write_new_batch(tmp_path / "new.csv")
+    parent = joblib.load(tmp_path / "base" / "pipeline.joblib")
+
+    retrain_and_save(str(tmp_path / "base"), str(tmp_path / "new.csv"), out_dir=str(tmp_path / "next"))
+    child = joblib.load(tmp_path / "next" / "pipeline.joblib").named_steps["model"].coef_
+
+    new = pd.read_csv(tmp_path / "new.csv")
+    X_new, _, y_new, _ = split_dataset(new.drop(columns="target"), new["target"])
+    new_only = clone(parent.named_steps["model"]).fit(parent.named_steps["preprocess"].transform(X_new), y_new).coef_
+    before = parent.named_steps["model"].coef_
+
+    span = np.linalg.norm(new_only - before)
+    assert np.linalg.norm(child - before) < span
+    assert np.linalg.norm(child - new_only) < span
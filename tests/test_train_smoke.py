@@ -13,3 +13,4 @@ def test_train_smoke(tmp_path):
     saved_metadata = json.loads((tmp_path / "metadata.json").read_text(encoding="utf-8"))
     assert metadata["model_name"] == "logistic"
     assert saved_metadata["metrics"]["accuracy"] > 0.8
+    assert set(saved_metadata["global_importance"]) == set(saved_metadata["feature_names"])
@@ -0,0 +1,50 @@
+import joblib
+import numpy as np
+import pytest
+
+from exml.data import load_default_dataset
+from exml.train import train_and_save
+from exml.whatif import resolve_grid, what_if
+
+
+def test_what_if_matches_row_by_row_scoring(tmp_path):
+    train_and_save(model_name="logistic", out_dir=str(tmp_path))
+    pipeline = joblib.load(tmp_path / "pipeline.joblib")
+    background = joblib.load(tmp_path / "background.joblib")
+    row = load_default_dataset().X.iloc[[0]]
+
+    grids = [resolve_grid("mean radius", start=8.0, stop=20.0, steps=4), resolve_grid("worst area", values=[500, 900])]
+    result = what_if(pipeline, row, grids, background_df=background)
+
+    assert result.shape == [4, 2]
+    assert len(result.ice) == 8
+    assert len(result.partial_dependence) == 8
+    expected = []
+    for radius in grids[0].values:
+        for area in grids[1].values:
+            nudged = row.copy()
+            nudged["mean radius"] = radius
+            nudged["worst area"] = area
+            expected.append(pipeline.predict_proba(nudged)[0, 1])
+    assert np.allclose(result.ice, expected)
+
+
+def test_what_if_keeps_fractional_grid_on_integer_row(tmp_path):
+    train_and_save(model_name="logistic", out_dir=str(tmp_path))
+    pipeline = joblib.load(tmp_path / "pipeline.joblib")
+    row = load_default_dataset().X.iloc[[0]].astype(int)
+
+    result = what_if(pipeline, row, [resolve_grid("mean smoothness", values=[0.05, 0.1, 0.15])])
+
+    assert len(set(result.ice)) == 3
+
+
+def test_what_if_rejects_oversized_grid():
+    row = load_default_dataset().X.iloc[[0]]
+    grids = [
+        resolve_grid("mean radius", start=0, stop=1, steps=100),
+        resolve_grid("worst area", start=0, stop=1, steps=100),
+    ]
+
+    with pytest.raises(ValueError, match="limit"):
+        what_if(pipeline=None, input_df=row, grids=grids)